@@ -2,272 +2,401 @@
 """
 XPath-Achsenfunktionen (ancestor, descendant, siblings, etc.)
 """
-from typing import List, Optional, Tuple
+import itertools
+import re
+import weakref
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
 import psycopg2
+from db import schema_kind
+
+
+# Vorbereitete Anfragen der Achsenfunktionen: Name -> (Parametertypen, SQL).
+# Sie werden pro Verbindung einmal mit PREPARE angelegt und danach nur noch
+# per EXECUTE aufgerufen, sodass PostgreSQL sie nicht jedes Mal neu parst und plant.
+_STATEMENTS = {
+    # ancestor(v) = {w | pre(w) < pre(v) AND post(w) > post(v)}, für Autoren beim
+    # Laden vorberechnet (author_ancestor, schon ohne Duplikate)
+    "anc_accel": ("text", """
+        SELECT a.id, a.s_id, a.type, c.text
+        FROM author_ancestor aa
+        JOIN accel a ON a.id = aa.ancestor_id
+        LEFT JOIN content c ON a.id = c.id
+        WHERE aa.author_content = $1
+        ORDER BY a.id"""),
+    # Original Node/Edge schema: range predicate on the pre/post encoding
+    "anc_edge": ("text", """
+        SELECT DISTINCT n.id, n.s_id, n.type, n.content
+        FROM Node x
+        JOIN Node n ON n.pre_order < x.pre_order AND n.post_order > x.post_order
+        WHERE x.type = 'author' AND x.content = $1
+        ORDER BY n.id"""),
+    # descendant(v) = {w | pre(w) > pre(v) AND post(w) < post(v)}
+    "desc_accel": ("int", """
+        SELECT a.id, a.type, c.text
+        FROM accel x
+        JOIN accel a ON a.pre_order > x.pre_order AND a.post_order < x.post_order
+        LEFT JOIN content c ON a.id = c.id
+        WHERE x.id = $1
+        ORDER BY a.id"""),
+    "desc_edge": ("int", """
+        SELECT n.id, n.type, n.content
+        FROM Node x
+        JOIN Node n ON n.pre_order > x.pre_order AND n.post_order < x.post_order
+        WHERE x.id = $1
+        ORDER BY n.id"""),
+    # Rekursive Referenz-Implementierung über die parent- bzw. Edge-Kanten:
+    # unabhängig von der Pre/Post-Kodierung, daher Vergleichsbasis für die
+    # Bereichsanfragen (ancestor_nodes_recursive, descendant_nodes_recursive)
+    "anc_accel_rec": ("text", """
+        WITH RECURSIVE ancestors(id) AS (
+            SELECT a.parent
+            FROM accel a
+            JOIN content c ON a.id = c.id
+            WHERE a.type = 'author' AND c.text = $1 AND a.parent IS NOT NULL
+            UNION
+            SELECT a.parent
+            FROM ancestors anc
+            JOIN accel a ON anc.id = a.id
+            WHERE a.parent IS NOT NULL
+        )
+        SELECT a.id, a.s_id, a.type, c.text
+        FROM accel a
+        LEFT JOIN content c ON a.id = c.id
+        WHERE a.id IN (SELECT id FROM ancestors)
+        ORDER BY a.id"""),
+    "anc_edge_rec": ("text", """
+        WITH RECURSIVE ancestors(id) AS (
+            SELECT e.from_node FROM Node n JOIN Edge e ON n.id = e.to_node
+            WHERE n.type = 'author' AND n.content = $1
+            UNION
+            SELECT e.from_node FROM ancestors a JOIN Edge e ON a.id = e.to_node
+        )
+        SELECT n.id, n.s_id, n.type, n.content FROM Node n
+        WHERE n.id IN (SELECT id FROM ancestors)
+        ORDER BY n.id"""),
+    "desc_accel_rec": ("int", """
+        WITH RECURSIVE descendants(id) AS (
+            SELECT id FROM accel WHERE parent = $1
+            UNION
+            SELECT a.id
+            FROM accel a
+            JOIN descendants d ON a.parent = d.id
+        )
+        SELECT a.id, a.type, c.text
+        FROM accel a
+        LEFT JOIN content c ON a.id = c.id
+        WHERE a.id IN (SELECT id FROM descendants)
+        ORDER BY a.id"""),
+    "desc_edge_rec": ("int", """
+        WITH RECURSIVE descendants(id) AS (
+            SELECT to_node FROM Edge WHERE from_node = $1
+            UNION
+            SELECT e.to_node
+            FROM Edge e
+            JOIN descendants d ON e.from_node = d.id
+        )
+        SELECT n.id, n.type, n.content
+        FROM Node n
+        WHERE n.id IN (SELECT id FROM descendants)
+        ORDER BY n.id"""),
+    # accel schema: context lookup (must be an article with a parent)
+    # and sibling scan in a single round-trip
+    "sib_accel_following": ("int", """
+        WITH me AS (
+            SELECT parent, post_order FROM accel
+            WHERE id = $1 AND type = 'article' AND parent IS NOT NULL
+        )
+        SELECT a.id, a.type, c.text
+        FROM me
+        JOIN accel a ON a.parent = me.parent
+        LEFT JOIN content c ON a.id = c.id
+        WHERE a.type = 'article'
+          AND a.post_order > me.post_order
+        ORDER BY a.post_order"""),
+    "sib_accel_preceding": ("int", """
+        WITH me AS (
+            SELECT parent, post_order FROM accel
+            WHERE id = $1 AND type = 'article' AND parent IS NOT NULL
+        )
+        SELECT a.id, a.type, c.text
+        FROM me
+        JOIN accel a ON a.parent = me.parent
+        LEFT JOIN content c ON a.id = c.id
+        WHERE a.type = 'article'
+          AND a.post_order < me.post_order
+        ORDER BY a.post_order DESC"""),
+    # Original Node/Edge schema: type check, parent/position lookup
+    # and sibling scan in a single round-trip
+    "sib_edge_following": ("int", """
+        SELECT n2.id, n2.type, n2.content
+        FROM Node n
+        JOIN Edge me ON me.to_node = n.id
+        JOIN Edge sib ON sib.from_node = me.from_node
+        JOIN Node n2 ON n2.id = sib.to_node
+        WHERE n.id = $1
+          AND n.type = 'article'
+          AND n2.type = 'article'
+          AND sib.position > me.position
+        ORDER BY sib.position ASC"""),
+    "sib_edge_preceding": ("int", """
+        SELECT n2.id, n2.type, n2.content
+        FROM Node n
+        JOIN Edge me ON me.to_node = n.id
+        JOIN Edge sib ON sib.from_node = me.from_node
+        JOIN Node n2 ON n2.id = sib.to_node
+        WHERE n.id = $1
+          AND n.type = 'article'
+          AND n2.type = 'article'
+          AND sib.position < me.position
+        ORDER BY sib.position DESC"""),
+    # xpath_*_window on the accel schema (results in document order)
+    "win_anc_lookup_accel": ("int", """
+        SELECT a.type, c.text, a.pre_order, a.post_order
+        FROM accel a
+        LEFT JOIN content c ON a.id = c.id
+        WHERE a.id = $1"""),
+    "win_anc_author_accel": ("text", """
+        SELECT a.id, a.type, c.text
+        FROM accel a
+        LEFT JOIN content c ON c.id = a.id
+        JOIN author_ancestor aa ON aa.ancestor_id = a.id
+        WHERE aa.author_content = $1
+        ORDER BY a.id"""),
+    "win_anc_accel": ("int, int", """
+        SELECT a.id, a.type, c.text
+        FROM accel a
+        LEFT JOIN content c ON a.id = c.id
+        WHERE a.pre_order < $1
+          AND a.post_order > $2
+        ORDER BY a.pre_order"""),
+    "win_desc_accel": ("int", """
+        SELECT a.id, a.type, c.text
+        FROM accel x
+        JOIN accel a ON a.pre_order > x.pre_order AND a.post_order < x.post_order
+        LEFT JOIN content c ON a.id = c.id
+        WHERE x.id = $1
+        ORDER BY a.pre_order"""),
+    # xpath_*_window on the Node/Edge schema: same ranges on Node's pre/post
+    # encoding (Node ids are assigned in pre-order)
+    "win_anc_lookup_edge": ("int", """
+        SELECT type, content, pre_order, post_order
+        FROM Node
+        WHERE id = $1"""),
+    "win_anc_author_edge": ("text", """
+        SELECT n.id, n.type, n.content
+        FROM Node n
+        WHERE n.id IN (
+            SELECT anc.id
+            FROM Node author
+            JOIN Node anc ON anc.pre_order < author.pre_order AND anc.post_order > author.post_order
+            WHERE author.type = 'author' AND author.content = $1)
+        ORDER BY n.id"""),
+    "win_anc_edge": ("int, int", """
+        SELECT n.id, n.type, n.content
+        FROM Node n
+        WHERE n.pre_order < $1
+          AND n.post_order > $2
+        ORDER BY n.pre_order"""),
+    # article context: only article siblings, otherwise all siblings
+    "win_sib_accel_following": ("int", """
+        WITH me AS (
+            SELECT parent, pre_order, type FROM accel
+            WHERE id = $1 AND parent IS NOT NULL
+        )
+        SELECT a.id, a.type, c.text
+        FROM me
+        JOIN accel a ON a.parent = me.parent
+        LEFT JOIN content c ON a.id = c.id
+        WHERE a.pre_order > me.pre_order
+          AND (me.type <> 'article' OR a.type = 'article')
+        ORDER BY a.pre_order"""),
+    "win_sib_accel_preceding": ("int", """
+        WITH me AS (
+            SELECT parent, pre_order, type FROM accel
+            WHERE id = $1 AND parent IS NOT NULL
+        )
+        SELECT a.id, a.type, c.text
+        FROM me
+        JOIN accel a ON a.parent = me.parent
+        LEFT JOIN content c ON a.id = c.id
+        WHERE a.pre_order < me.pre_order
+          AND (me.type <> 'article' OR a.type = 'article')
+        ORDER BY a.pre_order"""),
+}
+
+# Bereits vorbereitete Anfragen je Verbindung (Prepared Statements sind sessiongebunden)
+_prepared: "weakref.WeakKeyDictionary[psycopg2.extensions.connection, Set[str]]" = weakref.WeakKeyDictionary()
+
+# Zeilen pro Netzwerk-Roundtrip beim Streamen über einen serverseitigen Cursor
+STREAM_ITERSIZE = 10000
+
+_PLACEHOLDER = re.compile(r"\$\d+")
+_stream_ids = itertools.count()
+
+
+def _execute_prepared(cur: psycopg2.extensions.cursor, name: str, params: Tuple) -> None:
+    """Führt die vorbereitete Anfrage name aus und legt sie beim ersten Aufruf an."""
+    prepared = _prepared.setdefault(cur.connection, set())
+    if name not in prepared:
+        arg_types, sql = _STATEMENTS[name]
+        cur.execute(f"PREPARE {name} ({arg_types}) AS {sql};")
+        prepared.add(name)
+    placeholders = ", ".join(["%s"] * len(params))
+    cur.execute(f"EXECUTE {name} ({placeholders});", params)
+
+
+def _count_prepared(cur: psycopg2.extensions.cursor, name: str, params: Tuple) -> int:
+    """
+    Zählt die Zeilen der Anfrage name, ohne sie zu übertragen: eine eigene
+    vorbereitete Anfrage {name}_count umschließt den SQL-Text mit count(*).
+    """
+    count_name = f"{name}_count"
+    prepared = _prepared.setdefault(cur.connection, set())
+    if count_name not in prepared:
+        arg_types, sql = _STATEMENTS[name]
+        cur.execute(f"PREPARE {count_name} ({arg_types}) AS SELECT count(*) FROM ({sql}) AS q;")
+        prepared.add(count_name)
+    placeholders = ", ".join(["%s"] * len(params))
+    cur.execute(f"EXECUTE {count_name} ({placeholders});", params)
+    return cur.fetchone()[0]
+
+
+def _stream_statement(
+    cur: psycopg2.extensions.cursor,
+    name: str,
+    params: Tuple,
+    itersize: int = STREAM_ITERSIZE
+) -> Iterator[Tuple]:
+    """
+    Liefert das Ergebnis der Anfrage name zeilenweise über einen serverseitigen
+    (benannten) Cursor, statt es vollständig im Client zu puffern.
+    DECLARE ... CURSOR akzeptiert kein EXECUTE, daher wird hier der SQL-Text
+    der Anfrage direkt verwendet.
+    """
+    _, sql = _STATEMENTS[name]
+    with cur.connection.cursor(name=f"{name}_stream_{next(_stream_ids)}") as stream_cur:
+        stream_cur.itersize = itersize
+        stream_cur.execute(_PLACEHOLDER.sub("%s", sql), params)
+        yield from stream_cur
+
+
+def _require_author_ancestor(cur: psycopg2.extensions.cursor) -> None:
+    """
+    Wird nach einem leeren Autoren-Ergebnis auf dem accel-Schema aufgerufen:
+    Enthält accel Autoren, author_ancestor aber keine Zeile, wurde accel nicht
+    über Node.insert_to_db bzw. insert_venues_to_db geladen. Dann wird
+    abgebrochen, statt stillschweigend keine Vorfahren zu liefern.
+    """
+    cur.execute("""
+        SELECT EXISTS (SELECT 1 FROM accel WHERE type = 'author')
+           AND NOT EXISTS (SELECT 1 FROM author_ancestor);
+    """)
+    if cur.fetchone()[0]:
+        raise RuntimeError(
+            "author_ancestor ist leer: accel über Node.insert_to_db oder insert_venues_to_db laden"
+        )
+
+
+def _checked_author_stream(
+    cur: psycopg2.extensions.cursor,
+    rows: Iterator[Tuple]
+) -> Iterator[Tuple]:
+    """Reicht rows durch und prüft author_ancestor, falls keine Zeile kam."""
+    empty = True
+    for row in rows:
+        empty = False
+        yield row
+    if empty:
+        _require_author_ancestor(cur)
 
 
 def ancestor_nodes(
     cur: psycopg2.extensions.cursor,
-    node_content: any
-) -> List[Tuple[int, str, Optional[str]]]:
+    node_content: any,
+    stream: bool = False
+) -> Union[List[Tuple[int, str, Optional[str]]], Iterator[Tuple[int, str, Optional[str]]]]:
     """
     Berechnet alle ancestor-Knoten eines gegebenen Knotens in der DB.
     Funktioniert mit beiden Schemas (Node/Edge und accel/content).
+    Mit stream=True wird ein Iterator über einen serverseitigen Cursor geliefert.
     """
-    # Check which schema is being used
-    cur.execute("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'accel');")
-    has_accel = cur.fetchone()[0]
+    # Schema wird nur einmal ermittelt, nicht pro Aufruf
+    has_accel = schema_kind(cur) == "accel"
+    name = "anc_accel" if has_accel else "anc_edge"
 
-    if has_accel:
-        # Use new accel/content schema
-        cur.execute(
-            """WITH RECURSIVE ancestors(id) AS (
-                SELECT a.parent
-                FROM accel a
-                JOIN content c ON a.id = c.id
-                WHERE a.type = 'author' AND c.text = %s AND a.parent IS NOT NULL
-                UNION
-                SELECT a.parent
-                FROM ancestors anc
-                JOIN accel a ON anc.id = a.id
-                WHERE a.parent IS NOT NULL
-                )
-                SELECT a.id, a.s_id, a.type, c.text
-                FROM accel a
-                LEFT JOIN content c ON a.id = c.id
-                WHERE a.id IN (SELECT id FROM ancestors);""",
-            (node_content, )
-        )
-    else:
-        # Use original Node/Edge schema
-        cur.execute(
-            """WITH RECURSIVE ancestors(id) AS (
-                SELECT e.from_node FROM Node n JOIN Edge e ON n.id = e.to_node
-                WHERE n.type = 'author' AND n.content = %s
-                UNION
-                SELECT e.from_node FROM ancestors a JOIN Edge e ON a.id = e.to_node
-                )
-                SELECT n.id, n.s_id, n.type, n.content FROM Node n
-                WHERE n.id IN (SELECT id FROM ancestors)
-                ORDER BY n.id;""",
-            (node_content, )
-        )
-    return cur.fetchall()
+    if stream:
+        rows = _stream_statement(cur, name, (node_content,))
+        return _checked_author_stream(cur, rows) if has_accel else rows
+    _execute_prepared(cur, name, (node_content,))
+    result = cur.fetchall()
+    if not result and has_accel:
+        _require_author_ancestor(cur)
+    return result
 
 
 def descendant_nodes(
     cur: psycopg2.extensions.cursor,
-    node_id: int
-) -> List[Tuple[int, str, Optional[str]]]:
+    node_id: int,
+    stream: bool = False
+) -> Union[List[Tuple[int, str, Optional[str]]], Iterator[Tuple[int, str, Optional[str]]]]:
     """
     Berechnet alle descendant-Knoten eines gegebenen Knotens in der DB.
     Funktioniert mit beiden Schemas (Node/Edge und accel/content).
+    Mit stream=True wird ein Iterator über einen serverseitigen Cursor geliefert,
+    sodass große Teilbäume nicht vollständig im Speicher landen.
     """
-    # Check which schema is being used
-    cur.execute("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'accel');")
-    has_accel = cur.fetchone()[0]
+    # Schema wird nur einmal ermittelt, nicht pro Aufruf
+    has_accel = schema_kind(cur) == "accel"
+    name = "desc_accel" if has_accel else "desc_edge"
 
-    if has_accel:
-        # Use new accel/content schema
-        cur.execute(
-            """
-            WITH RECURSIVE descendants(id) AS (
-                SELECT id FROM accel WHERE parent = %s
-                UNION
-                SELECT a.id
-                FROM accel a
-                JOIN descendants d ON a.parent = d.id
-            )
-            SELECT DISTINCT a.id, a.type, c.text
-            FROM accel a
-            LEFT JOIN content c ON a.id = c.id
-            WHERE a.id IN (SELECT id FROM descendants);
-            """,
-            (node_id,)
-        )
-    else:
-        # Use original Node/Edge schema
-        cur.execute(
-            """
-            WITH RECURSIVE Descendants(from_node, to_node) AS (
-                SELECT from_node, to_node FROM Edge WHERE from_node = %s
-                UNION
-                SELECT e.from_node, e.to_node
-                FROM Edge e
-                JOIN Descendants d ON e.from_node = d.to_node
-            )
-            SELECT DISTINCT Node.id, Node.type, Node.content
-            FROM Node
-            JOIN Descendants ON Node.id = Descendants.to_node
-            ORDER BY Node.id;
-            """,
-            (node_id,)
-        )
+    if stream:
+        return _stream_statement(cur, name, (node_id,))
+    _execute_prepared(cur, name, (node_id,))
     return cur.fetchall()
 
 
-def siblings(
+def ancestor_nodes_recursive(
     cur: psycopg2.extensions.cursor,
-    node_id: int,
-    direction: str = "following"
-) -> List[Tuple[int,str,Optional[str]]]:
+    node_content: any
+) -> List[Tuple[int, str, Optional[str]]]:
     """
-    Berechnet die following- oder preceding-sibling-Knoten eines Knotens
-    vom Typ <article>. Funktioniert mit beiden Schemas.
-    direction muss 'following' oder 'preceding' sein.
+    Wie ancestor_nodes, aber rekursiv über die Elternkanten statt über die
+    Pre/Post-Bereiche. Referenz für Korrektheitsvergleiche und Benchmarks.
     """
-    # Check which schema is being used
-    cur.execute("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'accel');")
-    has_accel = cur.fetchone()[0]
-
-    if has_accel:
-        # Use new accel/content schema
-        cur.execute("SELECT type, parent, post_order FROM accel WHERE id = %s;", (node_id,))
-        row = cur.fetchone()
-        if row is None or row[0] != "article":
-            return []
-
-        _, parent_id, my_post = row
-        if not parent_id:
-            return []
-
-        if direction == "following":
-            cur.execute(
-                """
-                SELECT a.id, a.type, c.text
-                FROM accel a
-                LEFT JOIN content c ON a.id = c.id
-                WHERE a.parent = %s
-                  AND a.type = 'article'
-                  AND a.post_order > %s
-                ORDER BY a.post_order;
-                """,
-                (parent_id, my_post)
-            )
-        else:  # preceding
-            cur.execute(
-                """
-                SELECT a.id, a.type, c.text
-                FROM accel a
-                LEFT JOIN content c ON a.id = c.id
-                WHERE a.parent = %s
-                  AND a.type = 'article'
-                  AND a.post_order < %s
-                ORDER BY a.post_order DESC;
-                """,
-                (parent_id, my_post)
-            )
-    else:
-        # Use original Node/Edge schema
-        cur.execute("SELECT type FROM Node WHERE id = %s;", (node_id,))
-        row = cur.fetchone()
-        if row is None or row[0] != "article":
-            return []
-
-        # Get parent
-        cur.execute("SELECT from_node FROM Edge WHERE to_node = %s;", (node_id,))
-        parent = cur.fetchone()
-        if not parent:
-            return []
-        parent_id = parent[0]
-
-        # Get position
-        cur.execute("SELECT position FROM Edge WHERE to_node = %s;", (node_id,))
-        pos_row = cur.fetchone()
-        if not pos_row:
-            return []
-        my_position = pos_row[0]
-
-        if direction == "following":
-            cur.execute(
-                """
-                SELECT n.id, n.type, n.content
-                FROM Edge e
-                JOIN Node n ON e.to_node = n.id
-                WHERE e.from_node = %s
-                  AND e.position > %s
-                  AND n.type = 'article'
-                ORDER BY e.position;
-                """,
-                (parent_id, my_position)
-            )
-        else:  # preceding
-            cur.execute(
-                """
-                SELECT n.id, n.type, n.content
-                FROM Edge e
-                JOIN Node n ON e.to_node = n.id
-                WHERE e.from_node = %s
-                  AND e.position < %s
-                  AND n.type = 'article'
-                ORDER BY e.position DESC;
-                """,
-                (parent_id, my_position)
-            )
-
+    name = "anc_accel_rec" if schema_kind(cur) == "accel" else "anc_edge_rec"
+    _execute_prepared(cur, name, (node_content,))
     return cur.fetchall()
 
 
-def xpath_ancestor_window_original(cur: psycopg2.extensions.cursor, context_node_id: int) -> List[Tuple[int, str, Optional[str]]]:
+def descendant_nodes_recursive(
+    cur: psycopg2.extensions.cursor,
+    node_id: int
+) -> List[Tuple[int, str, Optional[str]]]:
     """
-    Implements the ancestor axis using the original Node/Edge schema.
-    Uses recursive CTE to find all ancestor nodes.
-
-    Special case: If the context node is an author, find ancestors of ALL authors with the same content
-    to match the behavior of the recursive ancestor_nodes function.
+    Wie descendant_nodes, aber rekursiv über die Kindkanten statt über die
+    Pre/Post-Bereiche. Referenz für Korrektheitsvergleiche und Benchmarks.
     """
-    # Check if this is an author node
-    cur.execute("SELECT type, content FROM Node WHERE id = %s;", (context_node_id,))
-    node_info = cur.fetchone()
-
-    if node_info and node_info[0] == 'author' and node_info[1]:
-        # For author nodes, use the same logic as ancestor_nodes function
-        author_content = node_info[1]
-        cur.execute("""
-            WITH RECURSIVE ancestors(id) AS (
-                SELECT e.from_node FROM Node n JOIN Edge e ON n.id = e.to_node
-                WHERE n.type = 'author' AND n.content = %s
-                UNION
-                SELECT e.from_node FROM ancestors a JOIN Edge e ON a.id = e.to_node
-            )
-            SELECT n.id, n.type, n.content FROM Node n
-            WHERE n.id IN (SELECT id FROM ancestors)
-            ORDER BY n.id;
-        """, (author_content,))
-    else:
-        # For non-author nodes, find direct ancestors
-        cur.execute("""
-            WITH RECURSIVE ancestors(id) AS (
-                SELECT e.from_node FROM Edge e WHERE e.to_node = %s
-                UNION
-                SELECT e.from_node FROM ancestors a JOIN Edge e ON a.id = e.to_node
-            )
-            SELECT n.id, n.type, n.content FROM Node n
-            WHERE n.id IN (SELECT id FROM ancestors)
-            ORDER BY n.id;
-        """, (context_node_id,))
-
+    name = "desc_accel_rec" if schema_kind(cur) == "accel" else "desc_edge_rec"
+    _execute_prepared(cur, name, (node_id,))
     return cur.fetchall()
 
 
-def xpath_descendant_window_original(cur: psycopg2.extensions.cursor, context_node_id: int) -> List[Tuple[int, str, Optional[str]]]:
+def siblings(
+    cur: psycopg2.extensions.cursor,
+    node_id: int,
+    direction: str = "following"
+) -> List[Tuple[int,str,Optional[str]]]:
     """
-    Implements the descendant axis using the original Node/Edge schema.
-    Uses recursive CTE to find all descendant nodes.
+    Berechnet die following- oder preceding-sibling-Knoten eines Knotens
+    vom Typ <article>. Funktioniert mit beiden Schemas.
+    direction muss 'following' oder 'preceding' sein.
     """
-    cur.execute("""
-        WITH RECURSIVE descendants(from_node, to_node) AS (
-            SELECT from_node, to_node FROM Edge WHERE from_node = %s
-            UNION
-            SELECT e.from_node, e.to_node
-            FROM Edge e
-            JOIN descendants d ON e.from_node = d.to_node
-        )
-        SELECT DISTINCT n.id, n.type, n.content
-        FROM Node n
-        JOIN descendants d ON n.id = d.to_node
-        ORDER BY n.id;
-    """, (context_node_id,))
+    # Schema wird nur einmal ermittelt, nicht pro Aufruf
+    schema = schema_kind(cur)
+    suffix = "following" if direction == "following" else "preceding"
+
+    # Ein Round-Trip: ist der Knoten kein article, bleibt das Ergebnis leer
+    _execute_prepared(cur, f"sib_{schema}_{suffix}", (node_id,))
     return cur.fetchall()
 
 
@@ -275,36 +404,9 @@ def xpath_following_sibling_window_original(cur: psycopg2.extensions.cursor, con
     """
     Implements the following-sibling axis using the original Node/Edge schema.
     """
-    # Get node type and parent
-    cur.execute("SELECT type FROM Node WHERE id = %s;", (context_node_id,))
-    row = cur.fetchone()
-    if row is None or row[0] != "article":
-        return []
-
-    # Get parent
-    cur.execute("SELECT from_node FROM Edge WHERE to_node = %s;", (context_node_id,))
-    parent = cur.fetchone()
-    if not parent:
-        return []
-    parent_id = parent[0]
-
-    # Get position
-    cur.execute("SELECT position FROM Edge WHERE to_node = %s;", (context_node_id,))
-    pos_row = cur.fetchone()
-    if not pos_row:
-        return []
-    my_position = pos_row[0]
-
-    cur.execute("""
-        SELECT n.id, n.type, n.content
-        FROM Edge e
-        JOIN Node n ON e.to_node = n.id
-        WHERE e.from_node = %s
-          AND e.position > %s
-          AND n.type = 'article'
-        ORDER BY e.position;
-    """, (parent_id, my_position))
-
+    # Type check, parent/position lookup and sibling scan in one round-trip
+    # (same prepared statement as siblings() on the Node/Edge schema)
+    _execute_prepared(cur, "sib_edge_following", (context_node_id,))
     return cur.fetchall()
 
 
@@ -312,36 +414,9 @@ def xpath_preceding_sibling_window_original(cur: psycopg2.extensions.cursor, con
     """
     Implements the preceding-sibling axis using the original Node/Edge schema.
     """
-    # Get node type and parent
-    cur.execute("SELECT type FROM Node WHERE id = %s;", (context_node_id,))
-    row = cur.fetchone()
-    if row is None or row[0] != "article":
-        return []
-
-    # Get parent
-    cur.execute("SELECT from_node FROM Edge WHERE to_node = %s;", (context_node_id,))
-    parent = cur.fetchone()
-    if not parent:
-        return []
-    parent_id = parent[0]
-
-    # Get position
-    cur.execute("SELECT position FROM Edge WHERE to_node = %s;", (context_node_id,))
-    pos_row = cur.fetchone()
-    if not pos_row:
-        return []
-    my_position = pos_row[0]
-
-    cur.execute("""
-        SELECT n.id, n.type, n.content
-        FROM Edge e
-        JOIN Node n ON e.to_node = n.id
-        WHERE e.from_node = %s
-          AND e.position < %s
-          AND n.type = 'article'
-        ORDER BY e.position DESC;
-    """, (parent_id, my_position))
-
+    # Type check, parent/position lookup and sibling scan in one round-trip
+    # (same prepared statement as siblings() on the Node/Edge schema)
+    _execute_prepared(cur, "sib_edge_preceding", (context_node_id,))
     return cur.fetchall()
 
 
@@ -359,61 +434,31 @@ def xpath_ancestor_window(cur: psycopg2.extensions.cursor, context_node_id: int)
     Returns:
         List of tuples (id, type, content) for ancestor nodes
     """
-    # Check which schema is being used
-    cur.execute("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'accel');")
-    has_accel = cur.fetchone()[0]
+    # Schema wird nur einmal ermittelt, nicht pro Aufruf; beide Schemas tragen
+    # die Pre/Post-Kodierung, die Anfragen unterscheiden sich nur in den Tabellen
+    schema = schema_kind(cur)
 
-    if has_accel:
-        # Use new accel/content schema with pre/post-order numbers
-        cur.execute("""
-            SELECT a.type, c.text, a.pre_order, a.post_order
-            FROM accel a
-            LEFT JOIN content c ON a.id = c.id
-            WHERE a.id = %s;
-        """, (context_node_id,))
-
-        result = cur.fetchone()
-        if not result:
-            return []
-
-        node_type, node_content, context_pre, context_post = result
-
-        # Special case: If this is an author node, find ancestors of ALL authors with same content
-        if node_type == 'author' and node_content:
-            # Use the same logic as ancestor_nodes function for consistency
-            cur.execute("""
-                WITH RECURSIVE ancestors(id) AS (
-                    SELECT a.parent
-                    FROM accel a
-                    JOIN content c ON a.id = c.id
-                    WHERE a.type = 'author' AND c.text = %s AND a.parent IS NOT NULL
-                    UNION
-                    SELECT a.parent
-                    FROM ancestors anc
-                    JOIN accel a ON anc.id = a.id
-                    WHERE a.parent IS NOT NULL
-                )
-                SELECT a.id, a.type, c.text
-                FROM accel a
-                LEFT JOIN content c ON a.id = c.id
-                WHERE a.id IN (SELECT id FROM ancestors)
-                ORDER BY a.id;
-            """, (node_content,))
-        else:
-            # Use window function approach to find ancestors
-            cur.execute("""
-                SELECT a.id, a.type, c.text
-                FROM accel a
-                LEFT JOIN content c ON a.id = c.id
-                WHERE a.pre_order < %s
-                  AND a.post_order > %s
-                ORDER BY a.pre_order;
-            """, (context_pre, context_post))
+    _execute_prepared(cur, f"win_anc_lookup_{schema}", (context_node_id,))
+    result = cur.fetchone()
+    if not result:
+        return []
 
-        return cur.fetchall()
-    else:
-        # Use original Node/Edge schema with recursive approach
-        return xpath_ancestor_window_original(cur, context_node_id)
+    node_type, node_content, context_pre, context_post = result
+
+    # Special case: If this is an author node, find ancestors of ALL authors with same content
+    if node_type == 'author' and node_content:
+        # Same result as ancestor_nodes: precomputed author_ancestor rows (accel)
+        # or a pre/post range semi-join over all matching authors (Node/Edge).
+        # An existing author always has ancestors, so no rows means the table
+        # was never filled
+        _execute_prepared(cur, f"win_anc_author_{schema}", (node_content,))
+        rows = cur.fetchall()
+        if not rows and schema == "accel":
+            _require_author_ancestor(cur)
+        return rows
+
+    _execute_prepared(cur, f"win_anc_{schema}", (context_pre, context_post))
+    return cur.fetchall()
 
 
 def xpath_descendant_window(cur: psycopg2.extensions.cursor, context_node_id: int) -> List[Tuple[int, str, Optional[str]]]:
@@ -430,38 +475,154 @@ def xpath_descendant_window(cur: psycopg2.extensions.cursor, context_node_id: in
     Returns:
         List of tuples (id, type, content) for descendant nodes
     """
-    # Check which schema is being used
-    cur.execute("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'accel');")
-    has_accel = cur.fetchone()[0]
+    # Context lookup and range scan in one prepared statement; an unknown id
+    # simply yields no rows. Node/Edge: range scan on Node's pre/post encoding
+    name = "win_desc_accel" if schema_kind(cur) == "accel" else "desc_edge"
+    _execute_prepared(cur, name, (context_node_id,))
+    return cur.fetchall()
+
+
+def xpath_descendant_window_iter(
+    cur: psycopg2.extensions.cursor,
+    context_node_id: int,
+    itersize: int = STREAM_ITERSIZE
+) -> Iterator[Tuple[int, str, Optional[str]]]:
+    """
+    Streaming variant of xpath_descendant_window: rows are fetched through a
+    server-side (named) cursor in batches of itersize, so memory stays constant
+    regardless of the subtree size. Same rows and order as the list version.
 
-    if has_accel:
-        # Use new accel/content schema with pre/post-order numbers
-        cur.execute("""
-            SELECT pre_order, post_order
-            FROM accel
-            WHERE id = %s;
-        """, (context_node_id,))
+    Args:
+        cur: Database cursor (its connection must be inside a transaction)
+        context_node_id: ID of the context node
+        itersize: Rows per network round-trip
 
-        result = cur.fetchone()
-        if not result:
-            return []
+    Returns:
+        Iterator over (id, type, content) for descendant nodes
+    """
+    # Node/Edge: range scan on the pre/post encoding, ids are in pre-order
+    name = "win_desc_accel" if schema_kind(cur) == "accel" else "desc_edge"
+    return _stream_statement(cur, name, (context_node_id,), itersize)
 
-        context_pre, context_post = result
 
-        # Use window function approach to find descendants
-        cur.execute("""
-            SELECT a.id, a.type, c.text
-            FROM accel a
-            LEFT JOIN content c ON a.id = c.id
-            WHERE a.pre_order > %s
-              AND a.post_order < %s
-            ORDER BY a.pre_order;
-        """, (context_pre, context_post))
+def xpath_descendant_window_batch(
+    cur: psycopg2.extensions.cursor,
+    context_node_ids: List[int]
+) -> Dict[int, List[Tuple[int, str, Optional[str]]]]:
+    """
+    Evaluates the descendant axis for several context nodes in one query.
+    The context ids are passed as an array and joined against the pre/post
+    ranges, so N context nodes cost one round-trip instead of N.
 
-        return cur.fetchall()
+    Args:
+        cur: Database cursor
+        context_node_ids: IDs of the context nodes
+
+    Returns:
+        Dict context id -> list of (id, type, content) in document order
+        (empty list for unknown ids)
+    """
+    results: Dict[int, List[Tuple[int, str, Optional[str]]]] = {
+        node_id: [] for node_id in context_node_ids
+    }
+    if not results:
+        return results
+
+    if schema_kind(cur) == "accel":
+        cur.execute("""
+            SELECT ctx.id, a.id, a.type, c.text
+            FROM unnest(%s::int[]) AS ctx(id)
+            JOIN accel x ON x.id = ctx.id
+            JOIN accel a ON a.pre_order > x.pre_order AND a.post_order < x.post_order
+            LEFT JOIN content c ON c.id = a.id
+            ORDER BY ctx.id, a.pre_order;
+        """, (list(results),))
     else:
-        # Use original Node/Edge schema with recursive approach
-        return xpath_descendant_window_original(cur, context_node_id)
+        # Node carries the same pre/post encoding (ids are assigned in pre-order)
+        cur.execute("""
+            SELECT ctx.id, n.id, n.type, n.content
+            FROM unnest(%s::int[]) AS ctx(id)
+            JOIN Node x ON x.id = ctx.id
+            JOIN Node n ON n.pre_order > x.pre_order AND n.post_order < x.post_order
+            ORDER BY ctx.id, n.pre_order;
+        """, (list(results),))
+
+    for ctx_id, node_id, node_type, content in cur.fetchall():
+        results[ctx_id].append((node_id, node_type, content))
+    return results
+
+
+def xpath_ancestor_count(cur: psycopg2.extensions.cursor, context_node_id: int) -> int:
+    """
+    Number of rows xpath_ancestor_window would return, counted in the database.
+
+    Args:
+        cur: Database cursor
+        context_node_id: ID of the context node
+
+    Returns:
+        Number of ancestor nodes
+    """
+    schema = schema_kind(cur)
+    _execute_prepared(cur, f"win_anc_lookup_{schema}", (context_node_id,))
+    result = cur.fetchone()
+    if not result:
+        return 0
+
+    node_type, node_content, context_pre, context_post = result
+    if node_type == 'author' and node_content:
+        count = _count_prepared(cur, f"win_anc_author_{schema}", (node_content,))
+        if count == 0 and schema == "accel":
+            _require_author_ancestor(cur)
+        return count
+    return _count_prepared(cur, f"win_anc_{schema}", (context_pre, context_post))
+
+
+def xpath_descendant_count(cur: psycopg2.extensions.cursor, context_node_id: int) -> int:
+    """
+    Number of rows xpath_descendant_window would return, counted in the database.
+
+    Args:
+        cur: Database cursor
+        context_node_id: ID of the context node
+
+    Returns:
+        Number of descendant nodes
+    """
+    name = "win_desc_accel" if schema_kind(cur) == "accel" else "desc_edge"
+    return _count_prepared(cur, name, (context_node_id,))
+
+
+def xpath_following_sibling_count(cur: psycopg2.extensions.cursor, context_node_id: int) -> int:
+    """
+    Number of rows xpath_following_sibling_window would return, counted in the database.
+
+    Args:
+        cur: Database cursor
+        context_node_id: ID of the context node
+
+    Returns:
+        Number of following sibling nodes
+    """
+    schema = schema_kind(cur)
+    name = "win_sib_accel_following" if schema == "accel" else "sib_edge_following"
+    return _count_prepared(cur, name, (context_node_id,))
+
+
+def xpath_preceding_sibling_count(cur: psycopg2.extensions.cursor, context_node_id: int) -> int:
+    """
+    Number of rows xpath_preceding_sibling_window would return, counted in the database.
+
+    Args:
+        cur: Database cursor
+        context_node_id: ID of the context node
+
+    Returns:
+        Number of preceding sibling nodes
+    """
+    schema = schema_kind(cur)
+    name = "win_sib_accel_preceding" if schema == "accel" else "sib_edge_preceding"
+    return _count_prepared(cur, name, (context_node_id,))
 
 
 def xpath_following_sibling_window(cur: psycopg2.extensions.cursor, context_node_id: int) -> List[Tuple[int, str, Optional[str]]]:
@@ -478,46 +639,13 @@ def xpath_following_sibling_window(cur: psycopg2.extensions.cursor, context_node
     Returns:
         List of tuples (id, type, content) for following sibling nodes
     """
-    # Check which schema is being used
-    cur.execute("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'accel');")
-    has_accel = cur.fetchone()[0]
+    # Schema wird nur einmal ermittelt, nicht pro Aufruf
+    has_accel = schema_kind(cur) == "accel"
 
     if has_accel:
-        # Use new accel/content schema
-        cur.execute("""
-            SELECT parent, pre_order, type
-            FROM accel
-            WHERE id = %s;
-        """, (context_node_id,))
-
-        result = cur.fetchone()
-        if not result or result[0] is None:  # No parent means no siblings
-            return []
-
-        context_parent, context_pre, context_type = result
-
-        # For article nodes, only return article siblings
-        if context_type == 'article':
-            cur.execute("""
-                SELECT a.id, a.type, c.text
-                FROM accel a
-                LEFT JOIN content c ON a.id = c.id
-                WHERE a.parent = %s
-                  AND a.pre_order > %s
-                  AND a.type = 'article'
-                ORDER BY a.pre_order;
-            """, (context_parent, context_pre))
-        else:
-            # For other node types, return all siblings
-            cur.execute("""
-                SELECT a.id, a.type, c.text
-                FROM accel a
-                LEFT JOIN content c ON a.id = c.id
-                WHERE a.parent = %s
-                  AND a.pre_order > %s
-                ORDER BY a.pre_order;
-            """, (context_parent, context_pre))
-
+        # Context lookup (parent, pre_order, type) and sibling scan in one
+        # prepared statement; no parent or unknown id yields no rows
+        _execute_prepared(cur, "win_sib_accel_following", (context_node_id,))
         return cur.fetchall()
     else:
         # Use original Node/Edge schema
@@ -538,46 +666,13 @@ def xpath_preceding_sibling_window(cur: psycopg2.extensions.cursor, context_node
     Returns:
         List of tuples (id, type, content) for preceding sibling nodes
     """
-    # Check which schema is being used
-    cur.execute("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'accel');")
-    has_accel = cur.fetchone()[0]
+    # Schema wird nur einmal ermittelt, nicht pro Aufruf
+    has_accel = schema_kind(cur) == "accel"
 
     if has_accel:
-        # Use new accel/content schema
-        cur.execute("""
-            SELECT parent, pre_order, type
-            FROM accel
-            WHERE id = %s;
-        """, (context_node_id,))
-
-        result = cur.fetchone()
-        if not result or result[0] is None:  # No parent means no siblings
-            return []
-
-        context_parent, context_pre, context_type = result
-
-        # For article nodes, only return article siblings
-        if context_type == 'article':
-            cur.execute("""
-                SELECT a.id, a.type, c.text
-                FROM accel a
-                LEFT JOIN content c ON a.id = c.id
-                WHERE a.parent = %s
-                  AND a.pre_order < %s
-                  AND a.type = 'article'
-                ORDER BY a.pre_order;
-            """, (context_parent, context_pre))
-        else:
-            # For other node types, return all siblings
-            cur.execute("""
-                SELECT a.id, a.type, c.text
-                FROM accel a
-                LEFT JOIN content c ON a.id = c.id
-                WHERE a.parent = %s
-                  AND a.pre_order < %s
-                ORDER BY a.pre_order;
-            """, (context_parent, context_pre))
-
+        # Context lookup (parent, pre_order, type) and sibling scan in one
+        # prepared statement; no parent or unknown id yields no rows
+        _execute_prepared(cur, "win_sib_accel_preceding", (context_node_id,))
         return cur.fetchall()
     else:
         # Use original Node/Edge schema
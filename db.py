@@ -2,21 +2,62 @@
 """
 Datenbank-Utilities:
  - connect_db: Verbindung aufbauen
+ - get_pool:   gemeinsamer Verbindungspool (Import- und Abfrage-Verbindung)
+ - schema_kind: aktives Schema (accel oder Node/Edge), je Verbindung gemerkt
+ - reset_schema_kind: gemerktes Schema verwerfen
  - clear_db:    Datenbank leeren
  - setup_schema: Tabellen anlegen
+ - begin_bulk_load: Dauerhaftigkeit für eine Lade-Transaktion lockern
+ - finalize_schema: Fremdschlüssel und Indizes nach dem Laden anlegen
+ - vacuum_analyze: Sichtbarkeitskarte und Statistiken nach dem Laden setzen
+
+Indizes des accel-Schemas (von finalize_schema angelegt):
+ - idx_accel_pre_post (pre_order, post_order) INCLUDE (id, type): ancestor/descendant
+ - idx_accel_parent_type_post (parent, type, post_order) INCLUDE (id): siblings()
+ - idx_accel_parent_pre (parent, pre_order) INCLUDE (id, type): xpath_*_sibling_window
+ - idx_content_text (text): Einstieg über den Autorennamen
+ - idx_author_ancestor (author_content) INCLUDE (ancestor_id): ancestor_nodes,
+   Autoren-Fall von xpath_ancestor_window (Tabelle author_ancestor)
+
+Indizes des Node/Edge-Schemas:
+ - idx_edge_from_pos (from_node, position) INCLUDE (to_node): Kinder/Geschwister
+ - idx_edge_to (to_node) INCLUDE (from_node, position): Elternknoten
+ - idx_node_type_content (type, content), idx_node_s_id (s_id): Einstieg
+ - idx_node_pre_post (pre_order, post_order): ancestor/descendant
 """
 
+import weakref
 import psycopg2
 from psycopg2.extensions import cursor as PsycoCursor
+from psycopg2.pool import ThreadedConnectionPool
 from typing import Optional, Tuple, Any
 from config import DB_PARAMS
 
 
+_pool: Optional[ThreadedConnectionPool] = None
+# Schema je Verbindung: 'accel' oder 'edge'. setup_schema, clear_db und
+# reset_schema_kind (nach einem ROLLBACK) verwerfen den Eintrag
+_schema_kinds: "weakref.WeakKeyDictionary[psycopg2.extensions.connection, str]" = weakref.WeakKeyDictionary()
+
+
 def connect_db():
     """Stellt die Verbindung zur Datenbank her."""
     return psycopg2.connect(**DB_PARAMS)
 
 
+def get_pool() -> ThreadedConnectionPool:
+    """
+    Liefert den gemeinsamen Verbindungspool. Import (Bulk-Load) und
+    Test-Abfragen holen sich je eine eigene Verbindung daraus, statt sich einen
+    Cursor zu teilen oder für jede Stufe neu zu verbinden. Zurückgegebene
+    Verbindungen mit offener Transaktion rollt der Pool zurück.
+    """
+    global _pool
+    if _pool is None or _pool.closed:
+        _pool = ThreadedConnectionPool(1, 4, **DB_PARAMS)
+    return _pool
+
+
 def clear_db() -> None:
     """
     Löscht alle Tabellen und Sequenzen in der Datenbank.
@@ -24,6 +65,7 @@ def clear_db() -> None:
     conn = connect_db()
     cur = conn.cursor()
     # Drop all tables
+    cur.execute("DROP TABLE IF EXISTS author_ancestor CASCADE;")
     cur.execute("DROP TABLE IF EXISTS attribute CASCADE;")
     cur.execute("DROP TABLE IF EXISTS content CASCADE;")
     cur.execute("DROP TABLE IF EXISTS accel CASCADE;")
@@ -38,22 +80,38 @@ def clear_db() -> None:
     cur.execute("DROP SEQUENCE IF EXISTS optimized_accel_id_seq;")
     cur.execute("DrOP SEQUENCE IF EXISTS single_axis_accel_id_seq;")
     conn.commit()
+    # Erst nach dem COMMIT verwerfen, sonst könnte eine andere Verbindung
+    # zwischendurch noch das alte Schema sehen und merken
+    reset_schema_kind()
     cur.close()
     print("Datenbank geleert: Alle Tabellen und Sequences gelöscht.")
 
 
-def setup_schema(cur: psycopg2.extensions.cursor, use_original_schema: bool = False) -> None:
+def setup_schema(
+    cur: psycopg2.extensions.cursor,
+    use_original_schema: bool = False,
+    unlogged: bool = False
+) -> None:
     """
     Legt die Tabellen für das XPath Accelerator System an.
+    Fremdschlüssel und Sekundärindizes werden erst nach dem Laden durch
+    finalize_schema angelegt, damit sie nicht pro Zeile gepflegt werden müssen.
 
     Args:
         use_original_schema: Wenn True, wird das originale Node/Edge-Schema für Phase 1 Kompatibilität verwendet.
                             Wenn False, wird das neue accel/content/attribute-Schema für Window-Functions verwendet.
+        unlogged: Wenn True, werden die Tabellen UNLOGGED angelegt: Das Laden schreibt
+                  kein WAL, dafür sind die Daten nach einem Server-Absturz leer und
+                  müssen neu importiert werden (für den reproduzierbaren DBLP-Auszug vertretbar).
     """
+    # Gemerktes Schema verwerfen; der nächste schema_kind-Aufruf fragt neu ab
+    _schema_kinds.pop(cur.connection, None)
+    create_table = "CREATE UNLOGGED TABLE" if unlogged else "CREATE TABLE"
     if use_original_schema:
         print("Richte Original Node/Edge Schema ein (Phase 1 Kompatibilität)...")
 
         # Drop existing tables
+        cur.execute("DROP TABLE IF EXISTS author_ancestor;")
         cur.execute("DROP TABLE IF EXISTS attribute;")
         cur.execute("DROP TABLE IF EXISTS content;")
         cur.execute("DROP TABLE IF EXISTS accel;")
@@ -62,30 +120,34 @@ def setup_schema(cur: psycopg2.extensions.cursor, use_original_schema: bool = Fa
         print("Alte Tabellen gelöscht (falls vorhanden).")
 
         # Create original Node/Edge schema
-        cur.execute("""
-            CREATE TABLE Node (
+        cur.execute(f"""
+            {create_table} Node (
                 id SERIAL PRIMARY KEY,
                 s_id TEXT,
                 type TEXT,
-                content TEXT
+                content TEXT,
+                pre_order INTEGER,
+                post_order INTEGER,
+                level INTEGER
             );
         """)
-        cur.execute("""
-            CREATE TABLE Edge (
+        cur.execute(f"""
+            {create_table} Edge (
                 id SERIAL PRIMARY KEY,
-                from_node INTEGER REFERENCES Node(id),
-                to_node INTEGER REFERENCES Node(id),
+                from_node INTEGER,
+                to_node INTEGER,
                 position INTEGER
             );
         """)
 
         print("Original Schema Tabellen erstellt:")
-        print("  - Node: Core node table with SERIAL IDs")
+        print("  - Node: Core node table with SERIAL IDs and pre/post/level encoding")
         print("  - Edge: Parent-child relationships")
     else:
         print("Richte XPath Accelerator Datenbankschema ein...")
 
         # Drop existing tables in correct order (respecting foreign keys)
+        cur.execute("DROP TABLE IF EXISTS author_ancestor;")
         cur.execute("DROP TABLE IF EXISTS attribute;")
         cur.execute("DROP TABLE IF EXISTS content;")
         cur.execute("DROP TABLE IF EXISTS accel;")
@@ -95,34 +157,40 @@ def setup_schema(cur: psycopg2.extensions.cursor, use_original_schema: bool = Fa
         print("Alte Tabellen gelöscht (falls vorhanden).")
 
         # Create accel table - core node table with EDGE model structure
-        cur.execute("""
-            CREATE TABLE accel (
+        cur.execute(f"""
+            {create_table} accel (
                 id INT PRIMARY KEY,
                 pre_order INT NOT NULL,
                 post_order INT NOT NULL,
                 s_id VARCHAR(255),
                 parent INT,
-                type VARCHAR(50),
-                FOREIGN KEY (parent) REFERENCES accel(id)
+                type VARCHAR(50)
             );
         """)
 
         # Create content table - stores textual content of nodes
-        cur.execute("""
-            CREATE TABLE content (
+        cur.execute(f"""
+            {create_table} content (
                 id INT PRIMARY KEY,
-                text TEXT,
-                FOREIGN KEY (id) REFERENCES accel(id)
+                text TEXT
             );
         """)
 
         # Create attribute table - stores XML attributes as key-value pairs
-        cur.execute("""
-            CREATE TABLE attribute (
+        cur.execute(f"""
+            {create_table} attribute (
                 id INT,
                 text TEXT,
-                PRIMARY KEY (id, text),
-                FOREIGN KEY (id) REFERENCES accel(id)
+                PRIMARY KEY (id, text)
+            );
+        """)
+
+        # Vorberechnete ancestor-Achse für Autoren (beim Laden gefüllt):
+        # je Autorenname und Vorfahr eine Zeile
+        cur.execute(f"""
+            {create_table} author_ancestor (
+                author_content TEXT NOT NULL,
+                ancestor_id INT NOT NULL
             );
         """)
 
@@ -130,20 +198,128 @@ def setup_schema(cur: psycopg2.extensions.cursor, use_original_schema: bool = Fa
         print("  - accel: Core node table with post-order numbering")
         print("  - content: Node content storage")
         print("  - attribute: Node attributes storage")
+        print("  - author_ancestor: Precomputed ancestors per author name")
+
+
+def schema_kind(cur: psycopg2.extensions.cursor) -> str:
+    """
+    Liefert 'accel' oder 'edge' für das aktive Schema der Verbindung von cur.
+    Nur beim ersten Aufruf je Verbindung wird per to_regclass (Katalog-Cache
+    statt information_schema-Join) nachgesehen und das Ergebnis gemerkt.
+    Wer eine Transaktion mit setup_schema zurückrollt, muss danach
+    reset_schema_kind(conn) aufrufen.
+    """
+    conn = cur.connection
+    kind = _schema_kinds.get(conn)
+    if kind is None:
+        cur.execute("SELECT to_regclass('accel') IS NOT NULL;")
+        kind = "accel" if cur.fetchone()[0] else "edge"
+        _schema_kinds[conn] = kind
+    return kind
+
+
+def reset_schema_kind(conn: Optional[psycopg2.extensions.connection] = None) -> None:
+    """
+    Vergisst das gemerkte Schema von conn bzw. aller Verbindungen, z. B. nach
+    einem ROLLBACK oder nachdem Tabellen außerhalb von setup_schema gelöscht
+    wurden; der nächste
+    schema_kind-Aufruf fragt neu ab.
+    """
+    if conn is None:
+        _schema_kinds.clear()
+    else:
+        _schema_kinds.pop(conn, None)
+
+
+def begin_bulk_load(cur: psycopg2.extensions.cursor) -> None:
+    """
+    Lockert die Dauerhaftigkeit für die laufende Transaktion: Der eine COMMIT
+    am Ende des Ladens wartet nicht mehr auf den WAL-Flush. SET LOCAL gilt nur
+    bis zum Ende der Transaktion, danach gilt wieder die Server-Einstellung.
+    Schema-Anlage, Einfügen und COMMIT müssen daher in derselben Transaktion liegen.
+    """
+    cur.execute("SET LOCAL synchronous_commit = OFF;")
+
+
+def finalize_schema(cur: psycopg2.extensions.cursor, use_original_schema: bool = False) -> None:
+    """
+    Legt nach dem Bulk-Load die Fremdschlüssel und Sekundärindizes an und
+    aktualisiert die Planer-Statistiken. Ein Index-Aufbau über die fertige
+    Tabelle ist deutlich billiger als die Pflege bei jeder eingefügten Zeile.
+    """
+    if use_original_schema:
+        cur.execute("ALTER TABLE Edge ADD FOREIGN KEY (from_node) REFERENCES Node(id);")
+        cur.execute("ALTER TABLE Edge ADD FOREIGN KEY (to_node) REFERENCES Node(id);")
+
+        # Indizes für die Achsen-Abfragen: Geschwister-Scan über (from_node, position)
+        cur.execute("CREATE INDEX idx_edge_from_pos ON Edge (from_node, position) INCLUDE (to_node);")
+        # Eltern-Lookup über to_node: Schritt der rekursiven ancestor-CTEs und
+        # Einstieg (Elternknoten, Position) der Geschwister-Anfragen
+        cur.execute("CREATE INDEX idx_edge_to ON Edge (to_node) INCLUDE (from_node, position);")
+        # Einstieg über (type, content) in ancestor_nodes
+        cur.execute("CREATE INDEX idx_node_type_content ON Node (type, content);")
+        # Knoten-Lookup über den Schlüssel (Venue/Jahr/Publikation)
+        cur.execute("CREATE INDEX idx_node_s_id ON Node (s_id);")
+        # ancestor/descendant als Bereichsanfragen auf der Pre/Post-Kodierung
+        cur.execute("CREATE INDEX idx_node_pre_post ON Node (pre_order, post_order);")
+
+        cur.execute("ANALYZE Node;")
+        cur.execute("ANALYZE Edge;")
+    else:
+        cur.execute("ALTER TABLE accel ADD FOREIGN KEY (parent) REFERENCES accel(id);")
+        cur.execute("ALTER TABLE content ADD FOREIGN KEY (id) REFERENCES accel(id);")
+        cur.execute("ALTER TABLE attribute ADD FOREIGN KEY (id) REFERENCES accel(id);")
+
+        # ancestor/descendant als Bereichsanfragen auf (pre_order, post_order);
+        # INCLUDE (id, type) deckt die Projektion ab (Index-Only-Scan nach VACUUM)
+        cur.execute("CREATE INDEX idx_accel_pre_post ON accel (pre_order, post_order) INCLUDE (id, type);")
+        # Einstieg der ancestor-Anfrage über den Autorennamen
+        cur.execute("CREATE INDEX idx_content_text ON content (text);")
+        # Geschwister-Scan: parent + type als Gleichheit, post_order als Bereich/Sortierung
+        cur.execute("CREATE INDEX idx_accel_parent_type_post ON accel (parent, type, post_order) INCLUDE (id);")
+        # Geschwister-Fenster (xpath_*_sibling_window): parent als Gleichheit,
+        # pre_order als Bereich/Sortierung, type für den article-Filter im Index
+        cur.execute("CREATE INDEX idx_accel_parent_pre ON accel (parent, pre_order) INCLUDE (id, type);")
+
+        # author_ancestor wird beim Laden gefüllt (Node.insert_to_db, insert_venues_to_db)
+        cur.execute("ALTER TABLE author_ancestor ADD FOREIGN KEY (ancestor_id) REFERENCES accel(id);")
+        cur.execute("CREATE INDEX idx_author_ancestor ON author_ancestor (author_content) INCLUDE (ancestor_id);")
+
+        cur.execute("ANALYZE accel;")
+        cur.execute("ANALYZE content;")
+        cur.execute("ANALYZE attribute;")
+        cur.execute("ANALYZE author_ancestor;")
+
+
+def vacuum_analyze(conn: psycopg2.extensions.connection, use_original_schema: bool = False) -> None:
+    """
+    Führt VACUUM ANALYZE auf den geladenen Tabellen aus. Erst danach ist die
+    Sichtbarkeitskarte gesetzt und die Achsen-Anfragen können die abdeckenden
+    Indizes als Index-Only-Scan nutzen. VACUUM läuft nicht in einer Transaktion,
+    daher muss vorher committet sein; autocommit wird nur kurz eingeschaltet.
+    """
+    tables = ("Node", "Edge") if use_original_schema else ("accel", "content", "attribute", "author_ancestor")
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for table in tables:
+                cur.execute(f"VACUUM (ANALYZE) {table};")
+    finally:
+        conn.autocommit = autocommit
 
 
 def get_database_statistics(cur: psycopg2.extensions.cursor) -> Tuple[int, int, int]:
     """
     Gibt die Anzahl der Tupel in den XPath Accelerator Tabellen zurück.
+    Alle drei Zählungen in einer Anfrage (ein Round-Trip).
     Returns: (accel_count, content_count, attribute_count)
     """
-    cur.execute("SELECT COUNT(*) FROM accel;")
-    accel_count = cur.fetchone()[0]
-
-    cur.execute("SELECT COUNT(*) FROM content;")
-    content_count = cur.fetchone()[0]
-
-    cur.execute("SELECT COUNT(*) FROM attribute;")
-    attribute_count = cur.fetchone()[0]
+    cur.execute("""
+        SELECT (SELECT COUNT(*) FROM accel),
+               (SELECT COUNT(*) FROM content),
+               (SELECT COUNT(*) FROM attribute);
+    """)
+    accel_count, content_count, attribute_count = cur.fetchone()
 
     return accel_count, content_count, attribute_count
\ No newline at end of file
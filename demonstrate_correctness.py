@@ -24,7 +24,7 @@ def demonstrate_toy_example_correctness():
     
     try:
         # Check if single-axis schema exists
-        cur.execute("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'single_axis_accel');")
+        cur.execute("SELECT to_regclass('single_axis_accel') IS NOT NULL;")
         has_single_axis = cur.fetchone()[0]
         
         if not has_single_axis:
@@ -3,22 +3,26 @@
 Steuert Phase 1 (Original-Schema + Toy-Beispiel)
 und Phase 2 (accel-Schema + SMALL_BIB + Demo-Queries).
 """
+import mmap
 import os
 import re
 import sys
 
 from db import (
     connect_db,
+    get_pool,
     setup_schema,
+    begin_bulk_load,
+    finalize_schema,
+    vacuum_analyze,
     clear_db
 )
 from xml_parser import (
     parse_toy_example,
     extract_venue_publications,
-    validate_toy_example_inclusion,
-    count_nikolaus_augsten_publications,
-    find_toy_example_positions,
-    parse_extracted_data
+    parse_extracted_data,
+    extraction_stats,
+    TOY_EXAMPLE_KEYS,
 )
 from axes import (
     ancestor_nodes,
@@ -27,7 +31,7 @@ from axes import (
 )
 from model import (
     build_edge_model,
-    annotate_traversal_orders,
+    insert_venues_to_db,
 )
 from db import (
     get_database_statistics,
@@ -39,6 +43,16 @@ from performance_comparison import benchmark_descendant_queries
 from window_optimization import verify_window_optimization_equivalence
 from window_performance_analysis import analyze_window_performance
 
+# Nachzählen einer vorhandenen Datei in Phase 3: ein Regex liefert pro
+# Publikation das Key-Präfix (die ersten beiden Segmente), ein Dict-Lookup
+# ordnet es zu
+_PHASE3_VENUE_KEY = re.compile(rb'<(?:article|inproceedings) [^>\n]*?key="((?:conf|journals)/[^/"\n]+/)')
+_PHASE3_VENUE_BY_PREFIX = {
+    b'conf/vldb/': 'vldb', b'journals/pvldb/': 'vldb',
+    b'conf/sigmod/': 'sigmod', b'journals/pacmmod/': 'sigmod',
+    b'conf/icde/': 'icde', b'journals/icde/': 'icde',
+}
+
 
 def main_phase1() -> None:
     """
@@ -61,7 +75,10 @@ def main_phase1() -> None:
     root_node = build_edge_model(venues)
 
     print("2. Inserting into database...")
+    # Schema, Insert und Commit laufen in einer einzigen Transaktion
+    begin_bulk_load(cur)
     root_node.insert_to_original_db(cur, verbose=False)
+    finalize_schema(cur, use_original_schema=True)
     conn.commit()
 
     print("3. Key Node Mappings:")
@@ -150,72 +167,76 @@ def main_phase2(force_extraction: bool = False) -> None:
     output_file = "my_small_bib.xml"
     if force_extraction or not os.path.exists(output_file):
         print("1. Extracting venue-specific publications...")
-        venue_counts = extract_venue_publications("dblp.xml", output_file)
+        extraction = extract_venue_publications("dblp.xml", output_file)
     else:
         print("1. Using existing my_small_bib.xml file...")
-        # Count publications in existing file
-        venue_counts = {'vldb': 0, 'sigmod': 0, 'icde': 0}
-        venue_patterns = {
-            'vldb': re.compile(r'key="(conf/vldb/|journals/pvldb/)'),
-            'sigmod': re.compile(r'key="(conf/sigmod/|journals/pacmmod/)'),
-            'icde': re.compile(r'key="(conf/icde/)')
-        }
-        with open(output_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip().startswith('<article ') or line.strip().startswith('<inproceedings '):
-                    for venue, pattern in venue_patterns.items():
-                        if pattern.search(line):
-                            venue_counts[venue] += 1
-                            break
-
+        # Venues, Zeilen, Augsten-Zähler und Toy-Positionen aus dem Sidecar-Cache,
+        # sonst in einem Durchlauf über die Datei
+        extraction = extraction_stats(output_file)
+    venue_counts = extraction.venue_counts
+    line_count = extraction.line_count
+    file_size = extraction.byte_count
+
+    # Schritte 2-3.5: die Ergebnisse stehen bereits im ExtractionResult,
+    # die Datei wird dafür nicht erneut gelesen.
     # 2. Validiere Toy-Beispiel-Einschluss
     print("\n2. Validating toy example inclusion...")
-    validation_success = validate_toy_example_inclusion(output_file)
+    missing_keys = [key for key in TOY_EXAMPLE_KEYS if key not in extraction.toy_line_ranges]
+    for key in missing_keys:
+        print(f"  missing: {key}")
+    validation_success = not missing_keys
 
     # 3. Zähle Nikolaus Augsten Publikationen
     print("\n3. Counting Nikolaus Augsten publications...")
-    augsten_counts = count_nikolaus_augsten_publications(output_file)
+    augsten_counts = extraction.augsten_counts
+    for venue, count in augsten_counts.items():
+        print(f"  {venue.upper()}: {count} publications")
 
     # 3.5. Finde Toy-Beispiel-Positionen
     print("\n3.5. Finding toy example publication positions...")
-    toy_positions = find_toy_example_positions(output_file)
+    toy_positions = extraction.toy_positions()
+    for key_name, position in toy_positions.items():
+        print(f"  {key_name}: {position}")
 
-    # 4. File metrics
+    # 4. File metrics (aus Schritt 1, ohne die Datei erneut zu lesen)
     print("\n4. File metrics:")
-    file_size_kb = os.path.getsize(output_file) / 1024
-    with open(output_file, 'r', encoding='utf-8') as f:
-        line_count = sum(1 for _ in f)
+    file_size_kb = file_size / 1024
     print(f"  File size: {file_size_kb:.1f} KB")
     print(f"  Line count: {line_count:,}")
 
     # 5. Importiere Daten in die Datenbank
     print("\n5. Importing data into database...")
-    conn = connect_db()
+    # Eigene Import-Verbindung aus dem Pool; die Test-Abfragen nutzen eine andere
+    pool = get_pool()
+    conn = pool.getconn()
     if not conn:
         print("ERROR: Could not connect to database")
         return
 
     cur = conn.cursor()
-    setup_schema(cur)
+    # UNLOGGED: der Import schreibt kein WAL; die Daten lassen sich jederzeit neu laden
+    setup_schema(cur, unlogged=True)
 
-    # Parse extrahierte Daten und baue EDGE Model
+    # Parse extrahierte Daten; der EDGE-Model-Baum wird ohne Node-Objekte
+    # mit Pre/Post-Nummerierung direkt als accel-Zeilen geschrieben
     print("  Parsing extracted data...")
     venues = parse_extracted_data(output_file)
-    print("  Building EDGE model...")
-    root_node = build_edge_model(venues)
-    print("  Annotating nodes with traversal orders...")
-    annotate_traversal_orders(root_node)
-    print("  Inserting into database...")
-    root_node.insert_to_db(cur, verbose=False)
+    print("  Numbering and inserting EDGE model into database...")
+    # Schema, Insert und Commit laufen in einer einzigen Transaktion
+    begin_bulk_load(cur)
+    insert_venues_to_db(cur, venues, verbose=False)
+    finalize_schema(cur)
 
     conn.commit()
+    # Sichtbarkeitskarte setzen, damit die Achsen Index-Only-Scans nutzen können
+    vacuum_analyze(conn)
 
     # 6. Datenbankstatistiken
     accel_count, content_count, attribute_count = get_database_statistics(cur)
     print(f"  Database import completed.")
 
     cur.close()
-    conn.close()
+    pool.putconn(conn)
 
     print("\n=== Phase 2 Summary ===")
     print("Venue publication counts:")
@@ -299,25 +320,19 @@ def main_phase3() -> None:
         output_file = "my_big_bib.xml"
     if  os.path.exists(output_file):
         print("1. Extracting venue-specific publications...")
-        venue_counts = extract_venue_publications("dblp.xml", output_file)
+        venue_counts = extract_venue_publications("dblp.xml", output_file).venue_counts
     else:
         print("1. Using existing my_small_bib.xml file...")
         # Count publications in existing file
         venue_counts = {'vldb': 0, 'sigmod': 0, 'icde': 0}
-        venue_patterns = {
-            'vldb': re.compile(r'key="(conf/vldb/|journals/pvldb/)'),
-            'sigmod': re.compile(r'key="(conf/sigmod/|journals/pacmmod/)'),
-            'icde': re.compile(r'key="(conf/icde/|journals/icde/)'),
-            'pacmmod': re.compile(r'key="(conf/pacmmod/|journals/pacmmod/)'),
-            'pvldb': re.compile(r'key="(conf/pvldb/|journals/pvldb/)'),
-        }
-        with open(output_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip().startswith('<article ') or line.strip().startswith('<inproceedings '):
-                    for venue, pattern in venue_patterns.items():
-                        if pattern.search(line):
-                            venue_counts[venue] += 1
-                            break
+        # Ein finditer über die gemappte Datei statt Python-Code pro Zeile
+        if os.path.getsize(output_file) > 0:
+            with open(output_file, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for match in _PHASE3_VENUE_KEY.finditer(mm):
+                    venue = _PHASE3_VENUE_BY_PREFIX.get(match.group(1))
+                    if venue is not None:
+                        venue_counts[venue] += 1
 
 
 def select_phase() -> int:
@@ -1,9 +1,17 @@
 """
 Node-Klasse und Baumaufbau für das XPath Accelerator System.
 """
-from typing import Dict, List, Optional
-from lxml import etree
+import io
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 import psycopg2.extensions
+import psycopg2.extras
+from xml_parser import Publication
+
+# Zeilen, nach denen insert_to_db seine Puffer per COPY an die DB schickt
+FLUSH_ROWS = 10000
+# Spalten von author_ancestor: je Autorenname und Vorfahr eine Zeile
+AUTHOR_ANCESTOR_COLUMNS = ("author_content", "ancestor_id")
 
 
 class Node:
@@ -13,6 +21,12 @@ class Node:
     Nach dem Einfügen in die DB speichert 'db_id' die generierte ID.
     """
 
+    # Kein __dict__ pro Knoten: spart bei DBLP-großen Bäumen deutlich Speicher
+    __slots__ = (
+        "type", "content", "children", "db_id", "s_id", "attributes",
+        "pre_order", "post_order", "level", "subtree_size",
+    )
+
     def __init__(
         self,
         type_: str,
@@ -28,6 +42,8 @@ class Node:
         self.attributes: Dict[str, str] = attributes or {}
         self.pre_order: Optional[int] = None
         self.post_order: Optional[int] = None
+        self.level: Optional[int] = None
+        self.subtree_size: Optional[int] = None  # wird von window_optimization gesetzt
 
     def add_child(self, child: "Node") -> None:
         """Fügt diesem Knoten ein Kind hinzu."""
@@ -38,24 +54,41 @@ class Node:
         Berechnet sowohl Pre-Order- als auch Post-Order-Nummerierung für diesen Knoten und alle Kinder.
         Pre-Order: Knoten wird nummeriert, bevor die Kinder besucht werden.
         Post-Order: Knoten wird nummeriert, nachdem alle Kinder besucht wurden.
+        Iterativ mit explizitem Stack; die Zähler laufen als lokale ints und
+        werden am Ende in pre_counter/post_counter zurückgeschrieben.
         """
-        # Pre-Order: Nummeriere diesen Knoten zuerst
-        self.pre_order = pre_counter[0]
-        pre_counter[0] += 1
+        pre = pre_counter[0]
+        post = post_counter[0]
+
+        # (Knoten, False) = erster Besuch, (Knoten, True) = Kinder fertig
+        stack: List[Tuple[Node, bool]] = [(self, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                # Post-Order: Nummeriere diesen Knoten nach den Kindern
+                node.post_order = post
+                post += 1
+                continue
 
-        # Dann alle Kinder besuchen
-        for child in self.children:
-            child.calculate_traversal_orders(pre_counter, post_counter)
+            # Pre-Order: Nummeriere diesen Knoten zuerst
+            node.pre_order = pre
+            pre += 1
 
-        # Post-Order: Nummeriere diesen Knoten nach den Kindern
-        self.post_order = post_counter[0]
-        post_counter[0] += 1
+            # Dann alle Kinder besuchen (umgekehrt, damit das erste Kind oben liegt)
+            stack.append((node, True))
+            children = node.children
+            for idx in range(len(children) - 1, -1, -1):
+                stack.append((children[idx], False))
+
+        pre_counter[0] = pre
+        post_counter[0] = post
 
     def insert_to_db(
         self,
         cur: psycopg2.extensions.cursor,
         parent_id: Optional[int] = None,
-        verbose: bool = False
+        verbose: bool = False,
+        use_copy: bool = True
     ) -> None:
         """
         Fügt diesen Knoten in das XPath Accelerator Schema ein:
@@ -63,70 +96,227 @@ class Node:
         - content: Node textual content (if any)
         - attribute: Node XML attributes (if any)
 
+        Die Zeilen werden in Pre-Order gesammelt und je Tabelle per
+        COPY ... FROM STDIN geladen statt mit einem INSERT pro Zeile.
+        Mit use_copy=False (z. B. ohne COPY-Rechte) wird stattdessen ein
+        mehrzeiliges INSERT ... VALUES pro Tabelle und Puffer verwendet.
+
+        Nebenbei werden aus der Vorfahrenkette des Durchlaufs die Zeilen von
+        author_ancestor (Autorenname, Vorfahr) gesammelt und am Ende geladen.
+        Mit parent_id sind nur Vorfahren ab parent_id bekannt; vollständig ist
+        author_ancestor daher nur beim Einfügen ab der Wurzel.
+
         Note: Post-order numbering should be calculated before calling this method.
         """
-        # Generate unique ID if not set
-        if self.db_id is None:
-            # Use post-order number as ID for consistency
-            self.db_id = self.post_order
+        accel_rows: List[Tuple] = []
+        content_rows: List[Tuple[int, str]] = []
+        attribute_rows: List[Tuple[int, str]] = []
+        author_rows: Set[Tuple[str, int]] = set()
+        totals = [0, 0, 0]
 
-        # Insert into accel table
-        cur.execute(
-            "INSERT INTO accel (id, pre_order, post_order, s_id, parent, type) VALUES (%s, %s, %s, %s, %s, %s);",
-            (self.db_id, self.pre_order, self.post_order, self.s_id, parent_id, self.type)
-        )
+        # Je Eintrag: Knoten, Elternknoten und die ids aller Vorfahren
+        root_ancestors: Tuple[int, ...] = () if parent_id is None else (parent_id,)
+        stack: List[Tuple[Node, Optional[int], Tuple[int, ...]]] = [(self, parent_id, root_ancestors)]
+        while stack:
+            node, parent, ancestors = stack.pop()
+            # Use post-order number as ID for consistency
+            if node.db_id is None:
+                node.db_id = node.post_order
 
-        # Insert content if present
-        if self.content is not None and self.content.strip():
-            cur.execute(
-                "INSERT INTO content (id, text) VALUES (%s, %s);",
-                (self.db_id, self.content)
+            accel_rows.append(
+                (node.db_id, node.pre_order, node.post_order, node.s_id, parent, node.type)
             )
+            # isspace() prüft ohne die Kopie, die strip() anlegen würde
+            content = node.content
+            if content and not content.isspace():
+                content_rows.append((node.db_id, content))
+                if node.type == "author":
+                    author_rows.update((content, ancestor) for ancestor in ancestors)
+            # Die meisten Knoten haben keine Attribute: kein items()-Aufruf pro Knoten
+            if node.attributes:
+                db_id = node.db_id
+                attribute_rows.extend(
+                    (db_id, f"{attr_name}={attr_value}")
+                    for attr_name, attr_value in node.attributes.items()
+                )
 
-        # Insert attributes if present
-        for attr_name, attr_value in self.attributes.items():
-            cur.execute(
-                "INSERT INTO attribute (id, text) VALUES (%s, %s);",
-                (self.db_id, f"{attr_name}={attr_value}")
-            )
+            if node.children:
+                # Ein gemeinsames Tupel für alle Kinder
+                child_ancestors = ancestors + (node.db_id,)
+                for child in reversed(node.children):
+                    stack.append((child, node.db_id, child_ancestors))
+
+            # Puffer begrenzen statt den ganzen Baum in Zeilenlisten zu halten
+            if len(accel_rows) >= FLUSH_ROWS:
+                _flush_accel_rows(cur, accel_rows, content_rows, attribute_rows, totals, use_copy)
+
+        _flush_accel_rows(cur, accel_rows, content_rows, attribute_rows, totals, use_copy)
+        if author_rows:
+            if use_copy:
+                copy_rows(cur, "author_ancestor", AUTHOR_ANCESTOR_COLUMNS, author_rows)
+            else:
+                bulk_insert(cur, f"INSERT INTO author_ancestor ({', '.join(AUTHOR_ANCESTOR_COLUMNS)}) VALUES %s",
+                            list(author_rows))
 
-        # Recursively insert children
-        for child in self.children:
-            child.insert_to_db(cur, self.db_id, verbose)
+        if verbose:
+            print(f"{totals[0]} accel-, {totals[1]} content- und "
+                  f"{totals[2]} attribute-Zeilen eingefügt")
 
     def insert_to_original_db(
         self,
         cur: psycopg2.extensions.cursor,
         parent_id: Optional[int] = None,
         position: int = 0,
-        verbose: bool = False
+        verbose: bool = False,
+        use_copy: bool = True
     ) -> None:
         """
         Fügt diesen Knoten in das Original Node/Edge Schema ein (Phase 1 Kompatibilität).
-        Verwendet SERIAL PRIMARY KEY für automatische ID-Zuweisung.
+        Die IDs werden vorab in einem Block aus der SERIAL-Sequenz reserviert und in
+        Pre-Order vergeben, danach werden Node und Edge per COPY geladen
+        (mit use_copy=False per mehrzeiligem INSERT, kein RETURNING nötig).
+        Zusätzlich wird die Pre/Post/Level-Kodierung mitgeschrieben, damit
+        ancestor/descendant ohne Rekursion über Edge beantwortet werden können.
         """
+        entries = flatten(self)
+
         cur.execute(
-            "INSERT INTO Node (s_id, type, content) VALUES (%s, %s, %s) RETURNING id;",
-            (self.s_id, self.type, self.content)
+            "SELECT nextval('node_id_seq') FROM generate_series(1, %s);",
+            (len(entries),)
         )
-        self.db_id = cur.fetchone()[0]
+        for (node, _, _), (node_id,) in zip(entries, cur.fetchall()):
+            node.db_id = node_id
 
+        node_rows = [
+            (node.db_id, node.s_id, node.type, node.content,
+             node.pre_order, node.post_order, node.level)
+            for node, _, _ in entries
+        ]
+        edge_rows = [(parent.db_id, node.db_id, pos) for node, parent, pos in entries[1:]]
         if parent_id is not None:
-            cur.execute(
-                "INSERT INTO Edge (from_node, to_node, position) VALUES (%s, %s, %s);",
-                (parent_id, self.db_id, position)
-            )
+            edge_rows.insert(0, (parent_id, self.db_id, position))
+
+        node_columns = ("id", "s_id", "type", "content", "pre_order", "post_order", "level")
+        edge_columns = ("from_node", "to_node", "position")
+        if use_copy:
+            copy_rows(cur, "Node", node_columns, node_rows)
+            copy_rows(cur, "Edge", edge_columns, edge_rows)
+        else:
+            bulk_insert(cur, f"INSERT INTO Node ({', '.join(node_columns)}) VALUES %s", node_rows)
+            bulk_insert(cur, f"INSERT INTO Edge ({', '.join(edge_columns)}) VALUES %s", edge_rows)
+
+        if verbose:
+            print(f"{len(node_rows)} Nodes und {len(edge_rows)} Edges eingefügt")
 
-        for idx, child in enumerate(self.children):
-            child.insert_to_original_db(cur, self.db_id, idx, verbose)
+
+def _flush_accel_rows(
+    cur: psycopg2.extensions.cursor,
+    accel_rows: List[Tuple],
+    content_rows: List[Tuple[int, str]],
+    attribute_rows: List[Tuple[int, str]],
+    totals: List[int],
+    use_copy: bool = True
+) -> None:
+    """
+    Lädt die gepufferten Zeilen per COPY bzw. mehrzeiligem INSERT (accel zuerst)
+    und leert die Puffer. totals zählt die geschriebenen Zeilen.
+    """
+    for i, (table, columns, rows) in enumerate((
+        ("accel", ("id", "pre_order", "post_order", "s_id", "parent", "type"), accel_rows),
+        ("content", ("id", "text"), content_rows),
+        ("attribute", ("id", "text"), attribute_rows),
+    )):
+        if rows:
+            if use_copy:
+                copy_rows(cur, table, columns, rows)
+            else:
+                bulk_insert(cur, f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s", rows)
+            totals[i] += len(rows)
+            rows.clear()
+
+
+def flatten(root: Node) -> List[Tuple[Node, Optional[Node], int]]:
+    """
+    Durchläuft den Baum iterativ und gibt (Knoten, Elternknoten, Position unter
+    dem Elternknoten) in Pre-Order zurück.
+    Setzt dabei pre_order, post_order (jeweils ab 1) und level (Wurzel = 0).
+    """
+    entries: List[Tuple[Node, Optional[Node], int]] = []
+    pre = 0
+    post = 0
+    # Ein Eintrag mit node=None schließt den Elternknoten in Post-Order ab
+    stack: List[Tuple[Optional[Node], Optional[Node], int, int]] = [(root, None, 0, 0)]
+    while stack:
+        node, parent, position, level = stack.pop()
+        if node is None:
+            post += 1
+            parent.post_order = post
+            continue
+
+        pre += 1
+        node.pre_order = pre
+        node.level = level
+        entries.append((node, parent, position))
+
+        stack.append((None, node, 0, 0))
+        for idx in range(len(node.children) - 1, -1, -1):
+            stack.append((node.children[idx], node, idx, level + 1))
+    return entries
+
+
+def _copy_value(value: object) -> str:
+    """Kodiert einen Wert für das Textformat von COPY (NULL als \\N)."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(
+    cur: psycopg2.extensions.cursor,
+    table: str,
+    columns: Tuple[str, ...],
+    rows: Iterable[Tuple]
+) -> None:
+    """
+    Lädt alle Zeilen mit einem einzigen COPY ... FROM STDIN in die Tabelle,
+    statt pro Zeile ein INSERT an den Server zu schicken.
+    """
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_copy_value(value) for value in row))
+        buf.write("\n")
+    buf.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+
+
+def bulk_insert(
+    cur: psycopg2.extensions.cursor,
+    sql_prefix: str,
+    rows: Iterable[Tuple],
+    page_size: int = FLUSH_ROWS
+) -> None:
+    """
+    Fügt die Zeilen mit wenigen mehrzeiligen INSERT ... VALUES-Anweisungen ein
+    (page_size Zeilen je Anweisung). Alternative zu copy_rows für Umgebungen,
+    in denen COPY nicht erlaubt ist; sql_prefix enthält genau ein VALUES %s.
+    """
+    psycopg2.extras.execute_values(cur, sql_prefix, rows, page_size=page_size)
 
 
 def build_edge_model(
-    venues: Dict[str, Dict[str, List[etree._Element]]]
+    venues: Dict[str, Dict[str, List[Publication]]]
 ) -> Node:
     """
     Baut den Baum nach dem EDGE Model auf:
     bib -> venue -> year -> Publikationen -> Kinder (author, title, ...).
+    Erwartet die kompakten (tag, key, kinder)-Tupel aus xml_parser
+    (mdate/orcid sind dort bereits entfernt).
     Gibt den Wurzelknoten 'bib' zurück.
     """
     root_node = Node("bib")
@@ -135,15 +325,12 @@ def build_edge_model(
         venue_node = Node("venue", content=venue)
         for year, pubs in years.items():
             year_node = Node("year", content=year, s_id=f"{venue}_{year}")
-            for pub in pubs:
-                full_key = pub.get("key")
+            for tag, full_key, children in pubs:
                 short_key = full_key.split("/")[-1] if full_key else None
-                pub_node = Node(pub.tag, s_id=short_key)
+                pub_node = Node(tag, s_id=short_key)
 
-                for child in pub:
-                    if child.tag in ("mdate", "orcid"):
-                        continue
-                    pub_node.add_child(Node(child.tag, content=child.text))
+                for child_tag, child_text in children:
+                    pub_node.add_child(Node(child_tag, content=child_text))
 
                 year_node.add_child(pub_node)
 
@@ -154,6 +341,147 @@ def build_edge_model(
     return root_node
 
 
+# Spalten der accel-Zeilen in Pre-Order (id = post_order) plus die content-Zeilen
+# und die (ohne Duplikate gesammelten) author_ancestor-Zeilen:
+# (pre_orders, post_orders, s_ids, parents, types, content_rows, author_rows)
+AccelColumns = Tuple[array, array, List[Optional[str]], List[Optional[int]], List[str],
+                     List[Tuple[int, str]], Set[Tuple[str, int]]]
+
+
+def _new_columns() -> AccelColumns:
+    return array("i"), array("i"), [], [], [], [], set()
+
+
+def _emit(
+    cols: AccelColumns,
+    pre: int,
+    post: int,
+    s_id: Optional[str],
+    parent: Optional[int],
+    type_: str,
+    content: Optional[str]
+) -> None:
+    """Hängt einen Knoten an die Spalten an (content nur, wenn nicht leer)."""
+    pres, posts, s_ids, parents, types, content_rows, _ = cols
+    pres.append(pre)
+    posts.append(post)
+    s_ids.append(s_id)
+    parents.append(parent)
+    types.append(type_)
+    if content and not content.isspace():
+        content_rows.append((post, content))
+
+
+def _venue_size(years: Dict[str, List[Publication]]) -> int:
+    """Anzahl der Knoten im Teilbaum venue -> year -> Publikation -> Kinder."""
+    return 1 + sum(
+        1 + sum(1 + len(children) for _, _, children in pubs)
+        for pubs in years.values()
+    )
+
+
+def _number_venue(
+    cols: AccelColumns,
+    venue: str,
+    years: Dict[str, List[Publication]],
+    pre: int,
+    done: int,
+    bib_post: int
+) -> None:
+    """
+    Nummeriert den Teilbaum einer Venue und hängt ihn an cols an.
+    pre ist die Pre-Order-Nummer des venue-Knotens, done die Anzahl der davor
+    vergebenen Post-Order-Nummern. Da die Teilbaumgrößen aus den Kinderzahlen
+    bekannt sind, steht die Post-Order-Nummer (= id) eines Knotens schon fest,
+    bevor seine Kinder geschrieben werden.
+    """
+    author_rows = cols[6]
+    venue_post = done + _venue_size(years)
+    _emit(cols, pre, venue_post, None, bib_post, "venue", venue)
+
+    for year, pubs in years.items():
+        pre += 1
+        year_post = done + 1 + sum(1 + len(children) for _, _, children in pubs)
+        _emit(cols, pre, year_post, f"{venue}_{year}", venue_post, "year", year)
+
+        for tag, full_key, children in pubs:
+            pre += 1
+            pub_post = done + len(children) + 1
+            short_key = full_key.split("/")[-1] if full_key else None
+            _emit(cols, pre, pub_post, short_key, year_post, tag, None)
+
+            for idx, (child_tag, child_text) in enumerate(children, start=1):
+                pre += 1
+                _emit(cols, pre, done + idx, None, pub_post, child_tag, child_text)
+                # Die Vorfahrenkette eines Autors steht hier fest
+                if child_tag == "author" and child_text and not child_text.isspace():
+                    author_rows.update((
+                        (child_text, pub_post), (child_text, year_post),
+                        (child_text, venue_post), (child_text, bib_post),
+                    ))
+            done = pub_post
+
+        done = year_post
+
+
+def _copy_columns(cur: psycopg2.extensions.cursor, cols: AccelColumns) -> Tuple[int, int]:
+    """
+    Lädt die Spalten per COPY in accel, content und author_ancestor;
+    gibt die Zeilenzahlen von accel und content zurück.
+    """
+    pres, posts, s_ids, parents, types, content_rows, author_rows = cols
+    copy_rows(
+        cur, "accel",
+        ("id", "pre_order", "post_order", "s_id", "parent", "type"),
+        zip(posts, pres, posts, s_ids, parents, types)
+    )
+    copy_rows(cur, "content", ("id", "text"), content_rows)
+    copy_rows(cur, "author_ancestor", AUTHOR_ANCESTOR_COLUMNS, author_rows)
+    return len(posts), len(content_rows)
+
+
+def _venue_layout(venues: Dict[str, Dict[str, List[Publication]]]) -> Tuple[int, List[Tuple[str, int, int]]]:
+    """
+    Liefert die Post-Order-Nummer von bib und je Venue (venue, pre, done):
+    Die Venues belegen aufeinanderfolgende, disjunkte Nummernbereiche.
+    """
+    layout = []
+    pre = 2
+    done = 0
+    for venue, years in venues.items():
+        size = _venue_size(years)
+        layout.append((venue, pre, done))
+        pre += size
+        done += size
+    return done + 1, layout
+
+
+def insert_venues_to_db(
+    cur: psycopg2.extensions.cursor,
+    venues: Dict[str, Dict[str, List[Publication]]],
+    verbose: bool = False
+) -> int:
+    """
+    Schreibt den EDGE-Model-Baum (bib -> venue -> year -> Publikation -> Kinder)
+    direkt aus den gruppierten Publikationen ins accel-Schema, ohne Node-Objekte.
+    Pre-/Post-Order werden in einem Durchlauf vergeben (siehe _number_venue).
+    Das Ergebnis (einschließlich author_ancestor) entspricht
+    build_edge_model + annotate_traversal_orders + insert_to_db.
+    Gibt die Anzahl der accel-Zeilen zurück.
+    """
+    bib_post, layout = _venue_layout(venues)
+    cols = _new_columns()
+    _emit(cols, 1, bib_post, None, None, "bib", None)
+    for venue, pre, done in layout:
+        _number_venue(cols, venue, venues[venue], pre, done, bib_post)
+
+    accel_count, content_count = _copy_columns(cur, cols)
+
+    if verbose:
+        print(f"{accel_count} accel- und {content_count} content-Zeilen eingefügt")
+    return accel_count
+
+
 def annotate_traversal_orders(root_node: Node) -> None:
     """
     Annotates all nodes in the dataset with their corresponding pre-order and post-order
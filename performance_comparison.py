@@ -8,9 +8,9 @@ Performance-Vergleich zwischen verschiedenen XPath Accelerator Implementierungen
 import time
 import psycopg2
 from typing import List, Tuple, Dict, Optional
-from db import connect_db
+from db import get_pool, schema_kind
 from single_axis_accelerator import SingleAxisAccelerator
-from axes import descendant_nodes, xpath_descendant_window
+from axes import descendant_nodes_recursive, xpath_descendant_window
 
 
 def benchmark_descendant_queries() -> None:
@@ -19,7 +19,8 @@ def benchmark_descendant_queries() -> None:
     """
     print("Performance Benchmark:")
     
-    conn = connect_db()
+    pool = get_pool()
+    conn = pool.getconn()
     if not conn:
         print("  ERROR: Could not connect to database")
         return
@@ -55,7 +56,7 @@ def benchmark_descendant_queries() -> None:
         print(f"Benchmark error: {e}")
     finally:
         cur.close()
-        conn.close()
+        pool.putconn(conn)
 
 
 def get_test_nodes(cur: psycopg2.extensions.cursor) -> List[Tuple[int, str, str, str, Optional[str]]]:
@@ -66,8 +67,7 @@ def get_test_nodes(cur: psycopg2.extensions.cursor) -> List[Tuple[int, str, str,
     test_nodes = []
     
     # Check which schema is available
-    cur.execute("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'accel');")
-    has_accel = cur.fetchone()[0]
+    has_accel = schema_kind(cur) == "accel"
     
     if has_accel:
         # Use accel schema
@@ -99,7 +99,7 @@ def benchmark_edge_model(cur: psycopg2.extensions.cursor, test_nodes: List[Tuple
     
     for node_id, s_id, description, node_type, content in test_nodes:
         start_time = time.time()
-        descendants = descendant_nodes(cur, node_id)
+        descendants = descendant_nodes_recursive(cur, node_id)
         end_time = time.time()
         
         execution_time = (end_time - start_time) * 1000
@@ -134,7 +134,7 @@ def benchmark_single_axis_accelerator(cur: psycopg2.extensions.cursor, test_node
     results = {'times': [], 'counts': []}
     
     # Check if single-axis schema exists
-    cur.execute("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'single_axis_accel');")
+    cur.execute("SELECT to_regclass('single_axis_accel') IS NOT NULL;")
     has_single_axis = cur.fetchone()[0]
     
     if not has_single_axis:
@@ -203,7 +203,8 @@ def display_benchmark_results(results: Dict, test_nodes: List[Tuple[int, str, st
     print("="*60)
     
     # Get database connection to fetch detailed information
-    conn = connect_db()
+    pool = get_pool()
+    conn = pool.getconn()
     if not conn:
         print("  ERROR: Could not connect to database for detailed verification")
         return
@@ -253,50 +254,18 @@ def display_benchmark_results(results: Dict, test_nodes: List[Tuple[int, str, st
     
     finally:
         verification_cur.close()
-        conn.close()
+        pool.putconn(conn)
 
 
 def get_descendant_details(cur: psycopg2.extensions.cursor, node_id: int, method: str = 'edge_model') -> List[Tuple[int, str, Optional[str]]]:
     """
     Gets detailed descendant information including node IDs and content.
     """
-    # Check which schema is available
-    cur.execute("SELECT EXISTS (SELECT FROM information_schema.tables WHERE table_name = 'accel');")
-    has_accel = cur.fetchone()[0]
-    
     if method == 'edge_model':
-        # Use recursive approach similar to descendant_nodes function
-        if has_accel:
-            cur.execute("""
-                WITH RECURSIVE descendants(id) AS (
-                    SELECT id FROM accel WHERE parent = %s
-                    UNION
-                    SELECT a.id
-                    FROM accel a
-                    JOIN descendants d ON a.parent = d.id
-                )
-                SELECT DISTINCT a.id, a.type, c.text
-                FROM accel a
-                LEFT JOIN content c ON a.id = c.id
-                WHERE a.id IN (SELECT id FROM descendants)
-                ORDER BY a.id;
-            """, (node_id,))
-        else:
-            cur.execute("""
-                WITH RECURSIVE Descendants(from_node, to_node) AS (
-                    SELECT from_node, to_node FROM Edge WHERE from_node = %s
-                    UNION
-                    SELECT e.from_node, e.to_node
-                    FROM Edge e
-                    JOIN Descendants d ON e.from_node = d.to_node
-                )
-                SELECT DISTINCT Node.id, Node.type, Node.content
-                FROM Node
-                JOIN Descendants ON Node.id = Descendants.to_node
-                ORDER BY Node.id;
-            """, (node_id,))
-    
-    return cur.fetchall()
+        # Recursive walk over the parent links: the reference the range and
+        # window results in the verification table are checked against
+        return descendant_nodes_recursive(cur, node_id)
+    return []
 
 
 def main() -> None:
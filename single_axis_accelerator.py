@@ -6,7 +6,7 @@ Diese Implementierung zeigt die Korrektheit der Annotation am selben Ausschnitt
 """
 from typing import List, Optional, Tuple
 import psycopg2
-from db import connect_db
+from db import get_pool, reset_schema_kind
 from xml_parser import parse_toy_example
 from model import build_edge_model, annotate_traversal_orders
 
@@ -79,7 +79,7 @@ class SingleAxisAccelerator:
         )
         
         # Insert content if present
-        if node.content is not None and node.content.strip():
+        if node.content and not node.content.isspace():
             self.cur.execute(
                 "INSERT INTO single_axis_content (id, text) VALUES (%s, %s);",
                 (node.db_id, node.content)
@@ -131,7 +131,8 @@ def verify_single_axis_correctness() -> None:
     print("Single-Axis XPath Accelerator Implementation:")
     
     # Establish database connection
-    conn = connect_db()
+    pool = get_pool()
+    conn = pool.getconn()
     if not conn:
         print("  ERROR: Could not connect to database")
         return
@@ -160,9 +161,10 @@ def verify_single_axis_correctness() -> None:
     except Exception as e:
         print(f"  ERROR: {e}")
         conn.rollback()
+        reset_schema_kind(conn)
     finally:
         cur.close()
-        conn.close()
+        pool.putconn(conn)
 
 def show_annotation_consistency(cur: psycopg2.extensions.cursor, accelerator: SingleAxisAccelerator) -> None:
     """
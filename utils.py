@@ -3,9 +3,9 @@ Hilfsfunktionen für das XPath-Projekt.
 """
 import psycopg2
 import psycopg2.extensions
-from typing import List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional
 
-from db import connect_db, setup_schema
+from db import get_pool, setup_schema, finalize_schema, reset_schema_kind
 from xml_parser import parse_toy_example
 from model import (
     Node,
@@ -16,27 +16,35 @@ from model import (
 from axes import (
     xpath_ancestor_window,
     xpath_descendant_window,
+    xpath_descendant_window_batch,
     xpath_following_sibling_window,
     xpath_preceding_sibling_window,
+    xpath_ancestor_count,
+    xpath_following_sibling_count,
+    xpath_preceding_sibling_count,
     ancestor_nodes,
+    ancestor_nodes_recursive,
     descendant_nodes,
+    descendant_nodes_recursive,
     siblings
 )
 
 def print_nodes(
     label: str,
-    nodes: List[Tuple[int, str, Optional[str]]]
+    nodes: Iterable[Tuple[int, str, Optional[str]]]
 ) -> None:
     """
-    Gibt eine Liste von (id, type, content) für Debug-/Testzwecke auf der Konsole aus.
+    Gibt (id, type, content)-Tupel für Debug-/Testzwecke auf der Konsole aus.
+    Akzeptiert Listen ebenso wie Iteratoren (z. B. aus descendant_nodes(..., stream=True)).
     """
     print(f"{label}:")
-    if not nodes:
-        print("  Keine Knoten gefunden.")
-        return
-
+    found = False
     for node in nodes:
         print(node)
+        found = True
+
+    if not found:
+        print("  Keine Knoten gefunden.")
 
 
 def verify_traversal_orders(cur: psycopg2.extensions.cursor, publication_keys: List[str]) -> None:
@@ -46,38 +54,47 @@ def verify_traversal_orders(cur: psycopg2.extensions.cursor, publication_keys: L
     """
     print("\n=== Traversal Order Verification ===")
 
+    # Alle Publikationsknoten in einer Anfrage (erster Treffer je Schlüssel)
+    cur.execute("SELECT s_id, id, pre_order, post_order FROM accel WHERE s_id = ANY(%s);", (list(publication_keys),))
+    roots: Dict[str, Tuple[int, int, int]] = {}
+    for s_id, pub_id, pub_pre, pub_post in cur.fetchall():
+        roots.setdefault(s_id, (pub_id, pub_pre, pub_post))
+
+    # Alle Teilbäume in einer Bereichsanfrage auf der Pre/Post-Kodierung
+    # (inkl. Publikation), danach in einem Durchlauf nach Schlüssel gruppiert
+    subtrees: Dict[str, List[Tuple]] = {key: [] for key in roots}
+    if roots:
+        keys = list(roots)
+        cur.execute("""
+            SELECT r.key, a.id, a.pre_order, a.post_order, a.type, a.s_id, c.text
+            FROM unnest(%s::text[], %s::int[], %s::int[]) AS r(key, pre, post)
+            JOIN accel a ON a.pre_order >= r.pre AND a.post_order <= r.post
+            LEFT JOIN content c ON a.id = c.id
+            ORDER BY r.key, a.pre_order;
+        """, (keys, [roots[k][1] for k in keys], [roots[k][2] for k in keys]))
+        for key, *row in cur.fetchall():
+            subtrees[key].append(tuple(row))
+
     for pub_key in publication_keys:
         print(f"\nPublication: {pub_key}")
         print("-" * 50)
 
-        # Find the publication node
-        cur.execute("SELECT id, pre_order, post_order FROM accel WHERE s_id = %s;", (pub_key,))
-        pub_result = cur.fetchone()
-
-        if not pub_result:
+        if pub_key not in roots:
             print(f"Publication {pub_key} not found!")
             continue
 
-        pub_id, pub_pre, pub_post = pub_result
+        pub_id, pub_pre, pub_post = roots[pub_key]
         print(f"Publication Node: id={pub_id}, pre={pub_pre}, post={pub_post}")
 
-        # Get all descendants with their traversal orders
-        cur.execute("""
-            WITH RECURSIVE descendants(id, level) AS (
-                SELECT id, 0 FROM accel WHERE id = %s
-                UNION
-                SELECT a.id, d.level + 1
-                FROM accel a
-                JOIN descendants d ON a.parent = d.id
-            )
-            SELECT a.id, a.pre_order, a.post_order, a.type, a.s_id, c.text, d.level
-            FROM accel a
-            LEFT JOIN content c ON a.id = c.id
-            JOIN descendants d ON a.id = d.id
-            ORDER BY a.pre_order;
-        """, (pub_id,))
-
-        nodes = cur.fetchall()
+        # Ebene aus der Pre-Order-Reihenfolge: auf dem Stack liegen die
+        # Post-Order-Nummern der offenen Vorfahren
+        nodes = []
+        open_posts: List[int] = []
+        for node_id, pre_ord, post_ord, node_type, s_id, content in subtrees[pub_key]:
+            while open_posts and open_posts[-1] < post_ord:
+                open_posts.pop()
+            nodes.append((node_id, pre_ord, post_ord, node_type, s_id, content, len(open_posts)))
+            open_posts.append(post_ord)
 
         print("\nTree Structure (ordered by pre-order):")
         print("Level | Pre | Post | Type       | S_ID           | Content")
@@ -98,9 +115,15 @@ def test_queries(cur: psycopg2.extensions.cursor) -> None:
     """
     print("\nTeste XPath-Funktionen:\n")
 
-    # Check dataset size to ensure we're testing on toy example only
-    cur.execute("SELECT COUNT(*) FROM accel;")
-    node_count = cur.fetchone()[0]
+    # Check dataset size to ensure we're testing on toy example only.
+    # Die Katalogschätzung genügt für die grobe Schwelle; nur wenn sie klein
+    # ist oder fehlt (nie analysiert: -1 bzw. 0), wird exakt gezählt.
+    cur.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass('accel');")
+    row = cur.fetchone()
+    node_count = row[0] if row else 0
+    if node_count <= 1000:
+        cur.execute("SELECT COUNT(*) FROM accel;")
+        node_count = cur.fetchone()[0]
 
     if node_count > 1000:
         print("⚠️  WARNING: Large dataset detected. XPath window function tests should only run on toy example.")
@@ -141,23 +164,24 @@ def test_xpath_window_functions_toy_example(cur: psycopg2.extensions.cursor) ->
         }
     }
 
+    # Resolve all publication IDs and their descendants up front (one query each)
+    cur.execute("SELECT s_id, id FROM accel WHERE s_id = ANY(%s);", (test_publications,))
+    node_ids = dict(cur.fetchall())
+    window_descendants_by_id = xpath_descendant_window_batch(cur, list(node_ids.values()))
+
     for pub_key in test_publications:
         print(f"Testing publication: {pub_key}")
         print("-" * 50)
 
-        # Get the publication node ID
-        cur.execute("SELECT id FROM accel WHERE s_id = %s;", (pub_key,))
-        result = cur.fetchone()
-
-        if not result:
+        node_id = node_ids.get(pub_key)
+        if node_id is None:
             print(f"Publication {pub_key} not found!")
             continue
 
-        node_id = result[0]
-
         # Test 1: Ancestor axis (not tested against expected values, just consistency)
         print("1. Ancestor Axis:")
-        window_ancestors = xpath_ancestor_window(cur, node_id)
+        # Nur die Anzahl wird gebraucht: in der Datenbank zählen statt Zeilen holen
+        window_ancestor_count = xpath_ancestor_count(cur, node_id)
 
         # For toy example, test against Daniel Ulrich Schmitt ancestors
         cur.execute("""
@@ -169,8 +193,8 @@ def test_xpath_window_functions_toy_example(cur: psycopg2.extensions.cursor) ->
         author_result = cur.fetchone()
 
         if author_result:
-            recursive_ancestors = ancestor_nodes(cur, author_result[0])
-            print(f"  Window function: {len(window_ancestors)} ancestors")
+            recursive_ancestors = ancestor_nodes_recursive(cur, author_result[0])
+            print(f"  Window function: {window_ancestor_count} ancestors")
             print(f"  Recursive method: {len(recursive_ancestors)} ancestors")
 
             # For toy example, we expect 7 ancestors for Daniel Ulrich Schmitt
@@ -181,8 +205,8 @@ def test_xpath_window_functions_toy_example(cur: psycopg2.extensions.cursor) ->
 
         # Test 2: Descendant axis
         print("2. Descendant Axis:")
-        window_descendants = xpath_descendant_window(cur, node_id)
-        recursive_descendants = descendant_nodes(cur, node_id)
+        window_descendants = window_descendants_by_id[node_id]
+        recursive_descendants = descendant_nodes_recursive(cur, node_id)
 
         print(f"  Window function: {len(window_descendants)} descendants")
         print(f"  Recursive method: {len(recursive_descendants)} descendants")
@@ -198,17 +222,16 @@ def test_xpath_window_functions_toy_example(cur: psycopg2.extensions.cursor) ->
 
         # Test 3: Following-sibling axis (critical test for toy example)
         print("3. Following-Sibling Axis:")
-        window_following = xpath_following_sibling_window(cur, node_id)
+        window_count = xpath_following_sibling_count(cur, node_id)
         recursive_following = siblings(cur, node_id, direction="following")
 
-        print(f"  Window function: {len(window_following)} following siblings")
-        print(f"  Recursive method: {len(recursive_following)} following siblings")
+        print(f"  Window function: {window_count} following siblings")
+        print(f"  siblings(): {len(recursive_following)} following siblings")
 
         expected_following = expected_results[pub_key]["following_siblings"]
         print(f"  Expected (toy example): {expected_following} following siblings")
 
         # Verify they match expected and each other
-        window_count = len(window_following)
         recursive_count = len(recursive_following)
 
         if window_count == recursive_count == expected_following:
@@ -216,23 +239,22 @@ def test_xpath_window_functions_toy_example(cur: psycopg2.extensions.cursor) ->
         else:
             print("   Results don't match expected values!")
             if window_count != recursive_count:
-                print(f"    Window vs Recursive mismatch: {window_count} vs {recursive_count}")
+                print(f"    Window vs siblings() mismatch: {window_count} vs {recursive_count}")
             if recursive_count != expected_following:
                 print(f"    Expected vs Actual mismatch: {expected_following} vs {recursive_count}")
 
         # Test 4: Preceding-sibling axis (critical test for toy example)
         print("4. Preceding-Sibling Axis:")
-        window_preceding = xpath_preceding_sibling_window(cur, node_id)
+        window_count = xpath_preceding_sibling_count(cur, node_id)
         recursive_preceding = siblings(cur, node_id, direction="preceding")
 
-        print(f"  Window function: {len(window_preceding)} preceding siblings")
-        print(f"  Recursive method: {len(recursive_preceding)} preceding siblings")
+        print(f"  Window function: {window_count} preceding siblings")
+        print(f"  siblings(): {len(recursive_preceding)} preceding siblings")
 
         expected_preceding = expected_results[pub_key]["preceding_siblings"]
         print(f"  Expected (toy example): {expected_preceding} preceding siblings")
 
         # Verify they match expected and each other
-        window_count = len(window_preceding)
         recursive_count = len(recursive_preceding)
 
         if window_count == recursive_count == expected_preceding:
@@ -240,7 +262,7 @@ def test_xpath_window_functions_toy_example(cur: psycopg2.extensions.cursor) ->
         else:
             print("   Results don't match expected values!")
             if window_count != recursive_count:
-                print(f"    Window vs Recursive mismatch: {window_count} vs {recursive_count}")
+                print(f"    Window vs siblings() mismatch: {window_count} vs {recursive_count}")
             if recursive_count != expected_preceding:
                 print(f"    Expected vs Actual mismatch: {expected_preceding} vs {recursive_count}")
 
@@ -332,8 +354,8 @@ def generate_phase2_summary_tables(cur: psycopg2.extensions.cursor) -> None:
     print(f"  Daniel Ulrich Schmitt: {daniel_id}")
     print(f"  VLDB 2023: {vldb_id}")
 
-    # Collect results for EDGE model (recursive functions)
-    print(f"\nCOLLECTING EDGE MODEL RESULTS (Recursive Functions)")
+    # Collect results for EDGE model (axis functions on the Node/Edge schema)
+    print(f"\nCOLLECTING EDGE MODEL RESULTS (Axis Functions)")
 
     # Ancestor test
     ancestors_edge = ancestor_nodes(cur, "Daniel Ulrich Schmitt")
@@ -465,8 +487,9 @@ def test_xpath_accelerators_separately():
     print("XPATH ACCELERATOR TESTING (Toy Example)")
     print("="*60)
 
-    # Create a separate connection for toy example testing
-    test_conn = connect_db()
+    # Separate query connection from the shared pool (not the import connection's cursor)
+    pool = get_pool()
+    test_conn = pool.getconn()
     if not test_conn:
         print(" Could not connect to database for XPath testing")
         return
@@ -484,6 +507,7 @@ def test_xpath_accelerators_separately():
         toy_root = build_edge_model(toy_venues)
         annotate_traversal_orders(toy_root)
         toy_root.insert_to_db(test_cur, verbose=False)
+        finalize_schema(test_cur)
         test_conn.commit()
 
         print("2. Testing XPath window functions on toy example...")
@@ -499,6 +523,8 @@ def test_xpath_accelerators_separately():
 
     except Exception as e:
         print(f" XPath testing failed: {e}")
+        # Der Pool rollt die offene Transaktion zurück; gemerktes Schema verwerfen
+        reset_schema_kind(test_conn)
     finally:
         test_cur.close()
-        test_conn.close()
+        pool.putconn(test_conn)
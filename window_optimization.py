@@ -5,7 +5,7 @@ Implementiert erweiterte Window-Function-Optimierungen für effizientere XPath-A
 """
 from typing import List, Optional, Tuple, Dict
 import psycopg2
-from db import connect_db, setup_schema
+from db import get_pool, setup_schema, finalize_schema, reset_schema_kind
 from xml_parser import parse_toy_example
 from model import build_edge_model, annotate_traversal_orders
 from axes import xpath_descendant_window, xpath_ancestor_window
@@ -106,7 +106,7 @@ class OptimizedWindowAccelerator:
         )
         
         # Insert content if present
-        if node.content is not None and node.content.strip():
+        if node.content and not node.content.isspace():
             self.cur.execute(
                 "INSERT INTO optimized_content (id, text) VALUES (%s, %s);",
                 (node.db_id, node.content)
@@ -193,23 +193,20 @@ class OptimizedWindowAccelerator:
         
         # Optimization: For author nodes, use content-based search (consistent with Phase 2)
         if node_type == 'author' and node_content:
-            # Use recursive approach for author ancestors (matches Phase 2 behavior)
+            # Ancestors of all authors with this name (matches Phase 2 behavior),
+            # as a pre/post range semi-join instead of walking the parent chain
             self.cur.execute("""
-                WITH RECURSIVE ancestors(id) AS (
-                    SELECT a.parent
-                    FROM optimized_accel a
-                    JOIN optimized_content c ON a.id = c.id
-                    WHERE a.type = 'author' AND c.text = %s AND a.parent IS NOT NULL
-                    UNION
-                    SELECT a.parent
-                    FROM ancestors anc
-                    JOIN optimized_accel a ON anc.id = a.id
-                    WHERE a.parent IS NOT NULL
-                )
                 SELECT a.id, a.type, c.text
                 FROM optimized_accel a
                 LEFT JOIN optimized_content c ON a.id = c.id
-                WHERE a.id IN (SELECT id FROM ancestors)
+                WHERE a.id IN (
+                    SELECT anc.id
+                    FROM optimized_accel author
+                    JOIN optimized_content ac ON ac.id = author.id
+                    JOIN optimized_accel anc ON anc.pre_order < author.pre_order
+                                            AND anc.post_order > author.post_order
+                    WHERE author.type = 'author' AND ac.text = %s
+                )
                 ORDER BY a.id;
             """, (node_content,))
         else:
@@ -283,7 +280,8 @@ def verify_window_optimization_equivalence() -> None:
     print("Window Optimization Verification:")
     
     # Establish database connection
-    conn = connect_db()
+    pool = get_pool()
+    conn = pool.getconn()
     if not conn:
         print("  ERROR: Could not connect to database")
         return
@@ -307,6 +305,7 @@ def verify_window_optimization_equivalence() -> None:
         # Set up standard accelerator for comparison
         setup_schema(cur, use_original_schema=False)
         root_node.insert_to_db(cur, verbose=False)
+        finalize_schema(cur)
         conn.commit()
         
         # Compare results
@@ -318,9 +317,10 @@ def verify_window_optimization_equivalence() -> None:
     except Exception as e:
         print(f"  ERROR: {e}")
         conn.rollback()
+        reset_schema_kind(conn)
     finally:
         cur.close()
-        conn.close()
+        pool.putconn(conn)
 
 
 def compare_implementations(cur: psycopg2.extensions.cursor, accelerator: OptimizedWindowAccelerator) -> None:
@@ -6,7 +6,7 @@ Vergleicht Standard-Window-Functions mit optimierten Window-Functions.
 import time
 import psycopg2
 from typing import List, Tuple, Dict
-from db import connect_db
+from db import get_pool
 from window_optimization import OptimizedWindowAccelerator
 from axes import xpath_descendant_window, xpath_ancestor_window, xpath_following_sibling_window, xpath_preceding_sibling_window
 
@@ -16,7 +16,8 @@ def analyze_window_performance() -> None:
     """
     print("Detailed Window Performance Analysis:")
     
-    conn = connect_db()
+    pool = get_pool()
+    conn = pool.getconn()
     if not conn:
         print("  ERROR: Could not connect to database")
         return
@@ -48,7 +49,7 @@ def analyze_window_performance() -> None:
         print(f"  ERROR: {e}")
     finally:
         cur.close()
-        conn.close()
+        pool.putconn(conn)
 
 
 def test_descendant_performance(cur: psycopg2.extensions.cursor, accelerator: OptimizedWindowAccelerator) -> None:
@@ -5,395 +5,574 @@ XML-Parsing-Funktionen:
  - extract_venue_counts: Zählt SIGMOD/VLDB/ICDE-Tags per Regex.
 """
 
+import mmap
 import os
+import pickle
 import re
-from typing import Dict, List, Tuple, Optional
-from collections import defaultdict
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple, Optional
 from lxml import etree
 
-# Entity-Ersetzungen für häufige Zeichen
-entity_replacements = {
-    '&uuml;': 'ü', '&auml;': 'ä', '&ouml;': 'ö', '&szlig;': 'ß',
-    '&Uuml;': 'Ü', '&Auml;': 'Ä', '&Ouml;': 'Ö',
-    '&amp;': '&', '&lt;': '<', '&gt;': '>', '&quot;': '"', '&apos;': "'",
-    '&reg;': '®', '&micro;': 'µ', '&times;': '×',
-    '&eacute;': 'é', '&iacute;': 'í', '&aacute;': 'á', '&oacute;': 'ó', '&uacute;': 'ú',
-    '&Eacute;': 'É', '&Iacute;': 'Í', '&Aacute;': 'Á', '&Oacute;': 'Ó', '&Uacute;': 'Ú',
-    '&ccedil;': 'ç', '&Ccedil;': 'Ç', '&ntilde;': 'ñ', '&Ntilde;': 'Ñ',
-    '&Aring;': 'Å', '&aring;': 'å'
+# Muster für die Suche im extrahierten File (einmal beim Import kompiliert)
+_PUB_START = re.compile(rb'<(article|inproceedings) ')
+# Key-Attribut im Starttag einer Publikation
+_PUB_KEY = re.compile(rb'<(?:article|inproceedings) [^>\n]*?key="([^"]*)"')
+# Simple name pattern (most reliable)
+_AUGSTEN_NAME = re.compile(rb'Nikolaus\s+Augsten', re.IGNORECASE)
+# Jahr einer Publikation als einmal kompilierter XPath-Ausdruck statt findtext();
+# smart_strings=False, damit das Ergebnis keine Referenz auf das Element hält
+_YEAR_TEXT = etree.XPath('string(year)', smart_strings=False)
+
+# Schreibpuffer für die extrahierte Datei bzw. Blockgröße beim Einlesen
+WRITE_BUFFER_SIZE = 1 << 20
+READ_BUFFER_SIZE = 1 << 20
+
+# Venue-Zuordnung über die ersten beiden Segmente des DBLP-Keys
+VENUE_BY_PREFIX = {
+    'conf/vldb': 'vldb', 'journals/pvldb': 'vldb',
+    'conf/sigmod': 'sigmod', 'journals/pacmmod': 'sigmod',
+    'conf/icde': 'icde',
 }
+VENUES = ('vldb', 'sigmod', 'icde')
+# Kinder einer Publikation, die nicht in den Baum übernommen werden
+SKIPPED_CHILD_TAGS = frozenset({'mdate', 'orcid'})
+# Version des gepickelten Formats von parse_extracted_data (bei Änderungen erhöhen)
+_VENUES_CACHE_FORMAT = 2
+# Version des gepickelten ExtractionResult neben der extrahierten Datei
+_STATS_CACHE_FORMAT = 1
+
+# Kompakte, picklebare Darstellung einer Publikation:
+# (tag, key, ((kind_tag, kind_text), ...))
+Publication = Tuple[str, Optional[str], Tuple[Tuple[str, Optional[str]], ...]]
+Venues = Dict[str, Dict[str, List[Publication]]]
+
+
+# Keys der Publikationen aus dem Toy-Beispiel
+TOY_EXAMPLE_KEYS = (
+    'journals/pvldb/SchmittKAMM23',
+    'conf/sigmod/HutterAK0L22',
+    'journals/pacmmod/ThielKAHMS23',
+    'journals/pvldb/SchalerHS23',
+)
+
+
+class _LocalDtdResolver(etree.Resolver):
+    """
+    Liefert lokal referenzierte DTDs (dblp.dtd) aus einem prozessweiten Cache,
+    damit wiederholte Parser-Läufe die Datei nicht jedes Mal neu lesen.
+    Entfernte URLs werden nicht aufgelöst; die Parser laufen mit no_network=True.
+    """
+    _cache: Dict[str, bytes] = {}
+
+    def resolve(self, url, pubid, context):
+        if not url or ('://' in url and not url.startswith('file://')):
+            return None
+        path = os.path.abspath(url[len('file://'):] if url.startswith('file://') else url)
+        data = self._cache.get(path)
+        if data is None:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                return None
+            self._cache[path] = data
+        return self.resolve_string(data, context, base_url=url)
+
+
+_DTD_RESOLVER = _LocalDtdResolver()
+
+
+@dataclass
+class ExtractionResult:
+    """
+    Ergebnis von extract_venue_publications bzw. scan_extracted_publications:
+    Venue-Zähler, Kennzahlen der Ausgabedatei sowie Augsten-Zähler und
+    Zeilenbereiche der Toy-Beispiele, die beim Schreiben mitgezählt werden.
+    """
+    venue_counts: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(VENUES, 0))
+    line_count: int = 0
+    byte_count: int = 0
+    augsten_counts: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(VENUES, 0))
+    toy_line_ranges: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+
+    def record(self, venue: str, key: Optional[str], data: bytes) -> None:
+        """Verbucht eine geschriebene Publikation (data = ihre Zeilen in der Ausgabe)."""
+        first_line = self.line_count + 1
+        self.line_count += data.count(b'\n')
+        self.venue_counts[venue] += 1
+        if _mentions_augsten(data):
+            self.augsten_counts[venue] += 1
+        if key in TOY_EXAMPLE_KEYS:
+            self.toy_line_ranges[key] = (first_line, self.line_count)
+
+    def merge(self, other: "ExtractionResult") -> None:
+        """Hängt das Ergebnis eines nachfolgenden Abschnitts an (Zeilen relativ verschoben)."""
+        for venue in VENUES:
+            self.venue_counts[venue] += other.venue_counts[venue]
+            self.augsten_counts[venue] += other.augsten_counts[venue]
+        for key, (first, last) in other.toy_line_ranges.items():
+            self.toy_line_ranges[key] = (first + self.line_count, last + self.line_count)
+        self.line_count += other.line_count
+        self.byte_count += other.byte_count
+
+    def toy_positions(self) -> Dict[str, str]:
+        """Zeilenpositionen der Toy-Beispiele (Key-Name -> 'Line N' bzw. 'Lines a-b')."""
+        return {
+            key.split('/')[-1]: format_line_range(first, last)
+            for key, (first, last) in sorted(self.toy_line_ranges.items(), key=lambda kv: kv[1])
+        }
+
+
+def _mentions_augsten(data: bytes) -> bool:
+    """
+    Prüft, ob die Bytes einer Publikation Nikolaus Augsten nennen.
+    Vorfilter: jeder Treffer von _AUGSTEN_NAME (ASCII-IGNORECASE) enthält
+    kleingeschrieben b'augsten'; lower() und `in` laufen in C, der Regex wird
+    nur für die wenigen Kandidaten ausgeführt.
+    """
+    return b'augsten' in data.lower() and _AUGSTEN_NAME.search(data) is not None
+
+
+def format_line_range(first: int, last: int) -> str:
+    """'Line N' für einzeilige, 'Lines a-b' für mehrzeilige Publikationen."""
+    if first == last:
+        return f"Line {first}"
+    return f"Lines {first}-{last}"
+
+
+def classify_venue(key: Optional[str]) -> Optional[str]:
+    """Ordnet einen DBLP-Key (z.B. 'conf/vldb/X') per Dict-Lookup einer Venue zu."""
+    if not key:
+        return None
+    parts = key.split('/', 2)
+    if len(parts) < 2:
+        return None
+    return VENUE_BY_PREFIX.get(parts[0] + '/' + parts[1])
+
+
+def compact_publication(pub: etree._Element) -> Publication:
+    """
+    Übernimmt Tag, Key und die (Tag, Text)-Paare der Kinder aus einem Element.
+    Kinder aus SKIPPED_CHILD_TAGS werden schon hier verworfen.
+    """
+    return (
+        pub.tag,
+        pub.get("key"),
+        tuple((child.tag, child.text) for child in pub if child.tag not in SKIPPED_CHILD_TAGS)
+    )
+
+
+def iter_publications(file_path: str) -> Iterator[Tuple[str, str, Publication]]:
+    """
+    Streamt (venue, year, publication) für alle <article>/<inproceedings>
+    direkt unter <bib>, ohne den ganzen Baum aufzubauen. Die Datei wird in
+    Blöcken aus einem gepufferten Reader in einen XMLPullParser gefüttert,
+    verarbeitete Elemente werden sofort freigegeben.
+    """
+    # base_url, damit eine externe DTD relativ zur Datei gefunden wird
+    parser = etree.XMLPullParser(
+        events=('end',),
+        tag=('article', 'inproceedings'),
+        load_dtd=True,
+        no_network=True,
+        resolve_entities=True,
+        huge_tree=True,
+        base_url=os.path.abspath(file_path)
+    )
+    parser.resolvers.add(_DTD_RESOLVER)
+    with open(file_path, 'rb', buffering=READ_BUFFER_SIZE) as f:
+        while True:
+            chunk = f.read(READ_BUFFER_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            for _, pub in parser.read_events():
+                parent = pub.getparent()
+                if parent is not None and parent.tag == "bib":
+                    year = _YEAR_TEXT(pub)
+                    venue = classify_venue(pub.get("key"))
+
+                    if venue and year:
+                        yield venue, year, compact_publication(pub)
+
+                _release(pub)
+    parser.close()
 
 
 def parse_toy_example(
     file_path: str
-) -> Dict[str, Dict[str, List[etree._Element]]]:
+) -> Venues:
     """
     Liest das Toy-Beispiel (XML) ein und gruppiert nach Venue und Jahr.
     Ignoriert dabei die Tags 'mdate' und 'orcid'.
     """
-    parser = etree.XMLParser(
-        load_dtd=True,
-        no_network=False,
-        resolve_entities=True
-    )
-    tree = etree.parse(file_path, parser)
-    venues: Dict[str, Dict[str, List[etree._Element]]] = defaultdict(
-        lambda: defaultdict(list)
-    )
-    root = tree.getroot()
+    return _group_publications(file_path)
 
-    bib = root.find("bib")
-    if bib is None:
-        print("Kein <bib>-Element gefunden!")
-        return venues
 
-    for pub in bib:
-        if pub.tag not in ("article", "inproceedings"):
-            continue
+def _group_publications(file_path: str) -> Venues:
+    """
+    Gruppiert die Publikationen der Datei nach Venue und Jahr.
+    Gesammelt wird in einem flachen Dict mit (venue, year)-Schlüssel (ein
+    Lookup pro Publikation); die verschachtelte Sicht entsteht erst am Ende
+    und übernimmt die Listen ohne Kopie. Die Reihenfolge (erstes Auftreten)
+    bleibt dabei erhalten. Einfache Dicts statt defaultdict(lambda), damit
+    das Ergebnis picklebar ist.
+    """
+    groups: Dict[Tuple[str, str], List[Publication]] = {}
+    for venue, year, pub in iter_publications(file_path):
+        key = (venue, year)
+        pubs = groups.get(key)
+        if pubs is None:
+            groups[key] = [pub]
+        else:
+            pubs.append(pub)
 
-        year = pub.findtext("year")
-        key = pub.get("key")
-        venue: Optional[str] = None
+    venues: Venues = {}
+    for (venue, year), pubs in groups.items():
+        venues.setdefault(venue, {})[year] = pubs
+    return venues
 
-        if key:
-            if key.startswith("conf/sigmod") or key.startswith("journals/pacmmod"):
-                venue = "sigmod"
-            elif key.startswith("conf/vldb") or key.startswith("journals/pvldb"):
-                venue = "vldb"
-            elif key.startswith("conf/icde"):
-                venue = "icde"
 
-        if venue and year:
-            venues[venue][year].append(pub)
+def _format_publication(elem: etree._Element) -> bytes:
+    """Serialisiert eine Publikation eingerückt (1 Tab für Start-/End-Tag, 2 Tabs für Kinder)."""
+    xml_bytes = etree.tostring(
+        elem,
+        encoding='utf-8',
+        pretty_print=True,
+        with_tail=False
+    )
 
-    return venues
+    # Einrückung per bytes.replace statt Schleife über die einzelnen Zeilen:
+    # erste und letzte Zeile mit einem Tab, alle dazwischen mit zweien
+    if xml_bytes.endswith(b'\n'):
+        xml_bytes = xml_bytes[:-1]
+    last_nl = xml_bytes.rfind(b'\n')
+    if last_nl < 0:
+        return b'\t' + xml_bytes + b'\n'
+    return (
+        b'\t' + xml_bytes[:last_nl].replace(b'\n', b'\n\t\t')
+        + b'\n\t' + xml_bytes[last_nl + 1:] + b'\n'
+    )
 
 
-def resolve_entities(text: str) -> str:
-    """Ersetzt bekannte Entities durch ihre Unicode-Zeichen."""
-    # First handle known entities
-    for entity, replacement in entity_replacements.items():
-        text = text.replace(entity, replacement)
+def _release(elem: etree._Element) -> None:
+    """Gibt ein verarbeitetes Element frei, damit der Parser klein bleibt."""
+    elem.clear()
+    while elem.getprevious() is not None:
+        del elem.getparent()[0]
 
-    # Handle any remaining & that are not part of valid entities
-    # This is a simple approach - replace standalone & with &amp;
-    
-    # Find & that are not followed by a valid entity pattern
-    text = re.sub(r'&(?![a-zA-Z0-9#]+;)', '&amp;', text)
 
-    return text
+def _next_publication_start(mm: mmap.mmap, pos: int, limit: int) -> int:
+    """Offset des nächsten <article/<inproceedings-Starttags ab pos (sonst limit)."""
+    hits = [
+        hit for hit in (mm.find(b'<article ', pos, limit), mm.find(b'<inproceedings ', pos, limit))
+        if hit >= 0
+    ]
+    return min(hits) if hits else limit
 
 
+def _extract_chunk(
+    dblp_file: str,
+    part_file: str,
+    prolog: bytes,
+    start: int,
+    end: int
+) -> ExtractionResult:
+    """
+    Worker für die parallele Extraktion: parst den Bereich [start, end) der
+    Eingabe (beginnt an einer Publikationsgrenze) hinter dem Prolog der Datei
+    und schreibt die passenden Publikationen in part_file.
+    Die Zeilennummern im Ergebnis zählen ab Beginn von part_file.
+    """
+    result = ExtractionResult()
+    # base_url, damit dblp.dtd relativ zur Eingabedatei gefunden wird
+    parser = etree.XMLPullParser(
+        events=('end',),
+        tag=('article', 'inproceedings'),
+        load_dtd=True,
+        no_network=True,
+        resolve_entities=True,
+        recover=True,
+        huge_tree=True,
+        base_url=os.path.abspath(dblp_file)
+    )
+    parser.resolvers.add(_DTD_RESOLVER)
+    mm = _map_file(dblp_file)
+    try:
+        with open(part_file, 'wb', buffering=WRITE_BUFFER_SIZE) as out:
+            parser.feed(prolog)
+            for pos in range(start, end, WRITE_BUFFER_SIZE):
+                parser.feed(mm[pos:min(pos + WRITE_BUFFER_SIZE, end)])
+                for _, elem in parser.read_events():
+                    key = elem.get('key')
+                    venue = classify_venue(key)
+                    if venue is not None:
+                        data = _format_publication(elem)
+                        out.write(data)
+                        result.record(venue, key, data)
+                    _release(elem)
+    finally:
+        mm.close()
+    return result
+
+
+def _extract_parallel(dblp_file: str, out, workers: int, result: ExtractionResult) -> None:
+    """
+    Teilt die Eingabe nach Byte-Offsets in workers Abschnitte, richtet jeden
+    Abschnitt auf den nächsten Publikationsstart aus, extrahiert die Abschnitte
+    in eigenen Prozessen und hängt die Teildateien in Reihenfolge an out an.
+    """
+    mm = _map_file(dblp_file)
+    try:
+        # Alles vor der ersten Publikation (XML-Deklaration, DOCTYPE, Wurzel)
+        # wird jedem Worker vorangestellt; das schließende Wurzel-Tag entfällt.
+        body_end = mm.rfind(b'</')
+        first = _next_publication_start(mm, 0, body_end)
+        prolog = mm[:first]
+        size = body_end - first
+        bounds = [first] + [
+            _next_publication_start(mm, first + i * size // workers, body_end)
+            for i in range(1, workers)
+        ] + [body_end]
+    finally:
+        mm.close()
+
+    chunks = [(lo, hi) for lo, hi in zip(bounds, bounds[1:]) if lo < hi]
+    part_files = [f"{out.name}.{i}.xml.part" for i in range(len(chunks))]
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_extract_chunk, dblp_file, part_file, prolog, lo, hi)
+                for part_file, (lo, hi) in zip(part_files, chunks)
+            ]
+            # In Dateireihenfolge zusammenführen, damit die Zeilennummern stimmen
+            for future in futures:
+                result.merge(future.result())
+
+        for part_file in part_files:
+            with open(part_file, 'rb') as part:
+                shutil.copyfileobj(part, out, WRITE_BUFFER_SIZE)
+    finally:
+        for part_file in part_files:
+            if os.path.exists(part_file):
+                os.remove(part_file)
+
 
 def extract_venue_publications(
     dblp_file: str,
     output_file: str,
-    max_pubs: Optional[int] = None
-) -> Dict[str, int]:
+    max_pubs: Optional[int] = None,
+    workers: Optional[int] = None
+) -> ExtractionResult:
     """
     Extrahiert alle <article> und <inproceedings> per Streaming-Parser,
     schreibt sie pretty-printed mit Einrückung und bricht ab, sobald
     insgesamt max_pubs Publications geschrieben wurden (wenn gesetzt).
+    Ohne max_pubs wird die Eingabe auf workers Prozesse verteilt.
+    Augsten-Publikationen und Zeilen der Toy-Beispiele werden im selben
+    Durchlauf erfasst, die Ausgabedatei muss dafür nicht erneut gelesen werden.
 
     :param dblp_file:   Pfad zur DBLP-XML-Datei
     :param output_file: Pfad zur Ausgabedatei (XML)
     :param max_pubs:    Optional: Maximale Anzahl zu extrahierender Publikationen
-    :return:            Dict[venue, count]
+    :param workers:     Optional: Anzahl paralleler Prozesse (Standard: CPU-Kerne)
+    :return:            ExtractionResult mit Zählern und Kennzahlen der Ausgabe
     """
     #max_pubs = 10000
-    venue_prefixes = {
-        'vldb':   ('conf/vldb/', 'journals/pvldb/'),
-        'sigmod': ('conf/sigmod/', 'journals/pacmmod/'),
-        'icde':   ('conf/icde/',),
-    }
-    venue_counts = dict.fromkeys(venue_prefixes.keys(), 0)
-    total_written = 0
+    if workers is None:
+        workers = os.cpu_count() or 1
 
     header = (
-        '<?xml version="1.0" encoding="UTF-8"?>\n'
-        '<!DOCTYPE dblp SYSTEM "dblp.dtd">\n'
-        '<bib>\n'
+        b'<?xml version="1.0" encoding="UTF-8"?>\n'
+        b'<!DOCTYPE dblp SYSTEM "dblp.dtd">\n'
+        b'<bib>\n'
     )
-    footer = '</bib>\n'
+    footer = b'</bib>\n'
+
+    result = ExtractionResult(line_count=header.count(b'\n'))
 
-    with open(output_file, 'w', encoding='utf-8') as out:
+    with open(output_file, 'wb', buffering=WRITE_BUFFER_SIZE) as out:
         out.write(header)
 
-        context = etree.iterparse(
-            dblp_file,
-            events=('end',),
-            tag=('article', 'inproceedings'),
-            recover=True,
-            huge_tree=True
-        )
-        # Initialisiere den Parser mit dem DTD
-        for _, elem in context:
-            # Prüfe, ob das Element ein <article> oder <inproceedings> ist
-            key = (elem.get('key') or '').lower()
-            # Prüfe, ob der Key mit einem der Venue-Präfixe beginnt
-            for venue, prefixes in venue_prefixes.items():
-                # Wenn der Key mit einem der Präfixe beginnt, extrahiere das Elementund schreibe es in die Ausgabedatei
-                if any(key.startswith(p) for p in prefixes):
-                    xml_str = etree.tostring(
-                        elem,
-                        encoding='unicode',
-                        pretty_print=True
-                    )
-                    xml_str = resolve_entities(xml_str)
-
-                    lines = xml_str.splitlines()
-                    for idx, line in enumerate(lines):
-                        # 1 Tab für Start-/End-Tag, 2 Tabs für Kindelemente
-                        indent = '\t' if idx in (0, len(lines)-1) else '\t\t'
-                        out.write(f'{indent}{line}\n')
-
-                    venue_counts[venue] += 1
-                    total_written += 1
-                    break  # nicht weitere Venues prüfen
-
-            # Speicher freigeben, damit der Parser klein bleibt
-            elem.clear()
-            while elem.getprevious() is not None:
-                del elem.getparent()[0]
-
-            # Abbruch, wenn Limit erreicht
-            if max_pubs is not None and total_written >= max_pubs:
-                print(f"Reached limit of {max_pubs} publications, stopping early.")
-                break
+        if max_pubs is None and workers > 1:
+            _extract_parallel(dblp_file, out, workers, result)
+        else:
+            _extract_sequential(dblp_file, out, max_pubs, result)
 
         out.write(footer)
+        result.line_count += footer.count(b'\n')
+        result.byte_count = out.tell()
+
+    # Zahlen für spätere Läufe auf derselben Datei (siehe extraction_stats)
+    _store_cache(output_file + '.stats.pkl', _cache_stamp(output_file, _STATS_CACHE_FORMAT), result)
 
     print("Extraction completed:")
-    for vn, cnt in venue_counts.items():
+    for vn, cnt in result.venue_counts.items():
         print(f"  {vn.upper():6s}: {cnt} publications")
 
-    return venue_counts
-
+    return result
 
-def validate_toy_example_inclusion(extracted_file: str) -> bool:
-    """
-    Überprüft, ob alle Publikationen aus dem Toy-Beispiel in der extrahierten Datei enthalten sind.
-    Verwendet einfache Textsuche statt XML-Parsing.
-    """
-    print("Validating toy example inclusion...")
-
-    # Erwartete Keys aus dem Toy-Beispiel
-    expected_keys = [
-        'journals/pvldb/SchmittKAMM23',
-        'conf/sigmod/HutterAK0L22',
-        'journals/pacmmod/ThielKAHMS23',
-        'journals/pvldb/SchalerHS23'
-    ]
 
-    found_keys = set()
-
-    try:
-        with open(extracted_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-            for key in expected_keys:
-                if f'key="{key}"' in content:
-                    found_keys.add(key)
-
-        missing_keys = set(expected_keys) - found_keys
-        if missing_keys:
-            print(f"ERROR: {len(missing_keys)} publications from toy example are missing:")
-            for key in missing_keys:
-                print(f"  - {key}")
-            return False
-        else:
-            return True
-
-    except Exception as e:
-        print(f"Error validating toy example: {e}")
-        return False
-
-
-def count_nikolaus_augsten_publications(extracted_file: str) -> Dict[str, int]:
-    """
-    Zählt die Publikationen von Nikolaus Augsten pro Venue.
-    Verwendet robuste Textsuche mit verschiedenen Namensvariationen.
-    Angepasst für das spezielle Format mit mehrzeiligen Publikationen.
-    """
-    print("Counting Nikolaus Augsten publications...")
-
-    venue_counts = {'vldb': 0, 'sigmod': 0, 'icde': 0}
+def _extract_sequential(
+    dblp_file: str,
+    out,
+    max_pubs: Optional[int],
+    result: ExtractionResult
+) -> None:
+    """Extrahiert in einem Prozess; nötig, wenn max_pubs exakt eingehalten werden soll."""
+    total_written = 0
 
-    # Regex patterns für venue classification
-    venue_patterns = {
-        'vldb': re.compile(r'key="(conf/vldb/|journals/pvldb/)'),
-        'sigmod': re.compile(r'key="(conf/sigmod/|journals/pacmmod/)'),
-        'icde': re.compile(r'key="(conf/icde/)')
-    }
+    # Der Dateiname wird direkt an libxml2 übergeben, damit das Einlesen
+    # in C passiert und dblp.dtd relativ zur Eingabe gefunden wird.
+    # Mit geladener DTD löst lxml die Entities selbst auf.
+    context = etree.iterparse(
+        dblp_file,
+        events=('end',),
+        tag=('article', 'inproceedings'),
+        load_dtd=True,
+        no_network=True,
+        resolve_entities=True,
+        recover=True,
+        huge_tree=True
+    )
+    context.resolvers.add(_DTD_RESOLVER)
+    for _, elem in context:
+        # Ein Dict-Lookup auf dem Key-Präfix statt mehrerer startswith-Tests
+        key = elem.get('key')
+        venue = classify_venue(key)
+        if venue is not None:
+            data = _format_publication(elem)
+            out.write(data)
+            result.record(venue, key, data)
+            total_written += 1
 
-    # Simple name pattern (most reliable)
-    name_pattern = re.compile(r'Nikolaus\s+Augsten', re.IGNORECASE)
+        _release(elem)
 
-    try:
-        with open(extracted_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        # Abbruch, wenn Limit erreicht
+        if max_pubs is not None and total_written >= max_pubs:
+            print(f"Reached limit of {max_pubs} publications, stopping early.")
+            break
 
-        i = 0
-        while i < len(lines):
-            line_number = i + 1
-            stripped_line = lines[i].strip()
 
-            # Skip non-publication lines
-            if not (stripped_line.startswith('<article ') or stripped_line.startswith('<inproceedings ')):
-                i += 1
-                continue
+def _map_file(path: str) -> mmap.mmap:
+    """Bildet eine Datei schreibgeschützt in den Speicher ab."""
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
-            # Check venue for this publication
-            current_venue = None
-            for venue, pattern in venue_patterns.items():
-                if pattern.search(stripped_line):
-                    current_venue = venue
-                    break
 
-            if not current_venue:
-                i += 1
+def scan_extracted_publications(extracted_file: str) -> ExtractionResult:
+    """
+    Liest eine vorhandene extrahierte Datei in einem Durchlauf über die
+    gemappte Datei und liefert dasselbe ExtractionResult wie die Extraktion:
+    Venue- und Augsten-Zähler, Zeilenbereiche der Toy-Beispiele, Zeilen und
+    Bytes.
+    """
+    result = ExtractionResult()
+    size = os.path.getsize(extracted_file)
+    result.byte_count = size
+    if size == 0:
+        return result
+
+    with _map_file(extracted_file) as mm:
+        pos = 0
+        for match in _PUB_START.finditer(mm):
+            start = match.start()
+            if start < pos:
                 continue
 
-            # Collect the full publication (may span multiple lines)
-            pub_type = 'article' if stripped_line.startswith('<article') else 'inproceedings'
-            end_tag = f'</{pub_type}>'
-            publication_text = stripped_line
-
-            # If the publication doesn't end on the same line, collect more lines
-            if end_tag not in stripped_line:
-                j = i + 1
-                while j < len(lines) and end_tag not in lines[j].strip():
-                    publication_text += " " + lines[j].strip()
-                    j += 1
-                if j < len(lines):
-                    publication_text += " " + lines[j].strip()
-
-            # Check if this publication contains Nikolaus Augsten
-            if name_pattern.search(publication_text):
-                venue_counts[current_venue] += 1
-                # Debug: print found publication
-                # print(f"Found Nikolaus Augsten in {current_venue} at line {line_number}")
+            # Zeilen zwischen der vorigen und dieser Publikation
+            result.line_count += mm[pos:start].count(b'\n')
 
-            i += 1
+            end = mm.find(b'</' + match.group(1) + b'>', start)
+            end = mm.find(b'\n', end) if end != -1 else -1
+            pos = end + 1 if end != -1 else size
 
-        print("Nikolaus Augsten publications:")
-        for venue, count in venue_counts.items():
-            print(f"  {venue.upper()}: {count} publications")
+            key_match = _PUB_KEY.match(mm, start)
+            key = key_match.group(1).decode('utf-8') if key_match else None
+            venue = classify_venue(key)
+            data = mm[start:pos]
+            if venue is not None:
+                result.record(venue, key, data)
+            else:
+                result.line_count += data.count(b'\n')
 
-        return venue_counts
+        result.line_count += mm[pos:size].count(b'\n')
+        # Letzte Zeile ohne abschließendes \n zählt mit
+        if mm[size - 1:size] != b'\n':
+            result.line_count += 1
 
-    except Exception as e:
-        print(f"Error counting publications: {e}")
-        return venue_counts
+    return result
 
 
-def find_toy_example_positions(extracted_file: str) -> Dict[str, str]:
+def extraction_stats(extracted_file: str) -> ExtractionResult:
     """
-    Findet die genauen Zeilenpositionen der Toy-Beispiel-Publikationen in der extrahierten Datei.
-    Angepasst für das spezielle Format mit allen Elementen auf einer Zeile.
+    ExtractionResult einer vorhandenen extrahierten Datei. Liest die von
+    extract_venue_publications bzw. einem früheren Aufruf geschriebenen Zahlen
+    aus dem Sidecar-Cache; nur wenn er fehlt oder mtime/Größe nicht mehr
+    passen, wird die Datei mit scan_extracted_publications durchsucht.
     """
-    print("Finding toy example publication positions...")
-
-    # Erwartete Keys aus dem Toy-Beispiel
-    target_keys = [
-        'journals/pvldb/SchmittKAMM23',
-        'conf/sigmod/HutterAK0L22',
-        'journals/pacmmod/ThielKAHMS23',
-        'journals/pvldb/SchalerHS23'
-    ]
-
-    positions = {}
-
-    try:
-        with open(extracted_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        for i, line in enumerate(lines):
-            line_number = i + 1  # 1-based line numbering
-            stripped_line = line.strip()
-
-            # Check if this line contains one of our target publications
-            if stripped_line.startswith('<article ') or stripped_line.startswith('<inproceedings '):
-                for key in target_keys:
-                    if f'key="{key}"' in stripped_line:
-                        # In this format, each publication is on a single line
-                        # So start and end line are the same
-                        end_line = line_number
+    stamp = _cache_stamp(extracted_file, _STATS_CACHE_FORMAT)
+    cache_path = extracted_file + '.stats.pkl'
 
-                        # Extract just the publication key name for cleaner output
-                        key_name = key.split('/')[-1]  # e.g., 'SchmittKAMM23'
+    result = _load_cache(cache_path, stamp)
+    if result is None:
+        result = scan_extracted_publications(extracted_file)
+        _store_cache(cache_path, stamp, result)
 
-                        # Check if it spans multiple lines (look for closing tag on same line)
-                        pub_type = 'article' if stripped_line.startswith('<article') else 'inproceedings'
-                        end_tag = f'</{pub_type}>'
+    return result
 
-                        if end_tag not in stripped_line:
-                            # Multi-line publication, find the end
-                            for j in range(i + 1, len(lines)):
-                                if end_tag in lines[j].strip():
-                                    end_line = j + 1
-                                    break
 
-                        if line_number == end_line:
-                            positions[key_name] = f"Line {line_number}"
-                        else:
-                            positions[key_name] = f"Lines {line_number}-{end_line}"
+def _cache_stamp(file_path: str, cache_format: int) -> Tuple[int, int, int]:
+    """Kennung für einen Sidecar-Cache: Formatversion, mtime und Größe der Datei."""
+    st = os.stat(file_path)
+    return (cache_format, st.st_mtime_ns, st.st_size)
 
-                        print(f"  {key_name}: {positions[key_name]}")
-                        break
 
-        if not positions:
-            print("  No toy example publications found in the extracted file")
+def _load_cache(cache_path: str, stamp: Tuple[int, int, int]) -> Optional[object]:
+    """Liest einen Sidecar-Cache; None, wenn er fehlt, veraltet oder defekt ist."""
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                if pickle.load(f) == stamp:
+                    return pickle.load(f)
+        except Exception:
+            # Neben OSError/EOFError/UnpicklingError auch AttributeError,
+            # ImportError oder TypeError, wenn sich eine gepickelte Klasse
+            # (z. B. ExtractionResult) seitdem geändert hat: neu berechnen
+            pass
+    return None
 
-        return positions
 
-    except Exception as e:
-        print(f"Error finding toy example positions: {e}")
-        return positions
+def _store_cache(cache_path: str, stamp: Tuple[int, int, int], value: object) -> None:
+    """Schreibt einen Sidecar-Cache (Kennung, dann Wert); Fehler sind nicht fatal."""
+    try:
+        with open(cache_path, 'wb') as f:
+            pickle.dump(stamp, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        print(f"Cache {cache_path} konnte nicht geschrieben werden: {e}")
 
 
-def parse_extracted_data(file_path: str) -> Dict[str, Dict[str, List[etree._Element]]]:
+def parse_extracted_data(file_path: str) -> Venues:
     """
     Parst die extrahierte my_small_bib.xml und gruppiert nach venue und Jahr.
+    Das Ergebnis wird neben der Datei gepickelt und wiederverwendet, solange
+    sich mtime und Größe der Datei nicht geändert haben.
     """
-    parser = etree.XMLParser(
-        load_dtd=True,
-        no_network=False,
-        resolve_entities=True,
-        huge_tree=True
-    )
-    tree = etree.parse(file_path, parser)
-    venues: Dict[str, Dict[str, List[etree._Element]]] = defaultdict(
-        lambda: defaultdict(list)
-    )
-    root = tree.getroot()
-
-    # The root element is now <bib> directly
-    if root.tag == "bib":
-        bib = root
-    else:
-        bib = root.find("bib")
-        if bib is None:
-            print("Kein <bib>-Element gefunden!")
-            return venues
-
-    for pub in bib:
-        if pub.tag not in ("article", "inproceedings"):
-            continue
-
-        year = pub.findtext("year")
-        key = pub.get("key")
-        venue: Optional[str] = None
-
-        if key:
-            if key.startswith("conf/sigmod") or key.startswith("journals/pacmmod"):
-                venue = "sigmod"
-            elif key.startswith("conf/vldb") or key.startswith("journals/pvldb"):
-                venue = "vldb"
-            elif key.startswith("conf/icde"):
-                venue = "icde"
-
-        if venue and year:
-            venues[venue][year].append(pub)
+    stamp = _cache_stamp(file_path, _VENUES_CACHE_FORMAT)
+    cache_path = file_path + '.venues.pkl'
+
+    venues = _load_cache(cache_path, stamp)
+    if venues is None:
+        venues = _parse_extracted_xml(file_path)
+        _store_cache(cache_path, stamp, venues)
 
     return venues
+
+
+def _parse_extracted_xml(file_path: str) -> Venues:
+    """Liest die extrahierte Datei per iterparse ein."""
+    return _group_publications(file_path)